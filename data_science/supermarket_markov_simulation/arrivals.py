@@ -0,0 +1,149 @@
+"""
+Time-varying customer arrivals. Instead of drawing a uniform number of new customers every
+minute, arrivals follow a non-homogeneous Poisson process whose intensity (customers per minute)
+is given per hour of the day, e.g. loaded from data/arrival_profile.csv with the columns "hour"
+and "arrival_rate". All arrivals of a whole day are sampled up front in one vectorized call by
+inverting the cumulative intensity: the number of arrivals is Poisson distributed with the
+day's total intensity and the arrival times are uniform draws mapped through the inverse of the
+(piecewise linear) cumulative intensity.
+"""
+# Imports
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from markov_analysis import mean_arrival_rate
+import config
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True, eq=False)
+class ArrivalProfile:
+    """arrival intensity in customers per minute, piecewise constant per hour of the day."""
+
+    hours: np.ndarray  # first hour of every rate, strictly increasing within 0..23
+    rates: np.ndarray  # customers per minute from the given hour on
+    hourly_rates: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        hours = np.asarray(self.hours, dtype=np.int64)
+        rates = np.asarray(self.rates, dtype=np.float64)
+        if hours.ndim != 1 or hours.shape != rates.shape or not len(hours):
+            raise ValueError("Expected one arrival rate per hour!")
+        if np.any(np.diff(hours) <= 0) or hours[0] < 0 or hours[-1] > 23:
+            raise ValueError("Hours of the arrival rates must be strictly increasing in 0..23!")
+        if np.any(rates < 0):
+            raise ValueError("Arrival rates must be non-negative!")
+        # Before the first given hour, the last rate of the previous day still applies
+        periods = (np.searchsorted(hours, np.arange(24), side="right") - 1) % len(hours)
+        object.__setattr__(self, "hours", hours)
+        object.__setattr__(self, "rates", rates)
+        object.__setattr__(self, "hourly_rates", rates[periods])
+
+    @classmethod
+    def constant(cls, rate: float) -> "ArrivalProfile":
+        """returns a profile with the same rate all day, i.e. a homogeneous Poisson process"""
+        return cls(hours=np.zeros(1), rates=np.array([rate]))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ArrivalProfile":
+        """compiles a DataFrame with the columns "hour" and "arrival_rate" """
+        frame = frame.sort_values("hour")
+        return cls(hours=frame["hour"].to_numpy(), rates=frame["arrival_rate"].to_numpy())
+
+    @classmethod
+    def from_csv(cls, path: str | None = None) -> "ArrivalProfile":
+        """loads an arrival profile (by default the configured file)"""
+        return cls.from_frame(pd.read_csv(config.PATH_ARRIVAL_PROFILE if path is None else path))
+
+    @property
+    def mean_rate(self) -> float:
+        """returns the mean number of arrivals per minute over the day"""
+        return float(self.hourly_rates.mean())
+
+    def rate(self, minute: int | np.ndarray) -> float | np.ndarray:
+        """returns the arrival intensity at a simulation minute"""
+        return self.hourly_rates[(np.asarray(minute) // 60) % 24]
+
+    def sample_arrival_times(self, start: int, end: int, rng: np.random.Generator) -> np.ndarray:
+        """samples the sorted arrival times in [start, end) minutes in one vectorized call"""
+        # Breakpoints of the piecewise constant intensity and the cumulative intensity there
+        boundaries = np.arange((start // 60 + 1) * 60, end, 60)
+        minutes = np.concatenate([[start], boundaries, [end]]).astype(np.float64)
+        cum_intensity = np.concatenate(
+            [[0.0], np.cumsum(self.rate(minutes[:-1].astype(np.int64)) * np.diff(minutes))]
+        )
+        n_arrivals = rng.poisson(cum_intensity[-1])
+        draws = np.sort(rng.uniform(0.0, cum_intensity[-1], n_arrivals))
+        return np.interp(draws, cum_intensity, minutes)
+
+    def sample_counts(self, start: int, end: int, rng: np.random.Generator) -> np.ndarray:
+        """samples the number of arrivals in every minute of [start, end)"""
+        return arrivals_per_minute(self.sample_arrival_times(start, end, rng), start, end)
+
+
+def arrivals_per_minute(times: np.ndarray, start: int, end: int) -> np.ndarray:
+    """counts arrival times per minute of [start, end)"""
+    minutes = np.minimum(np.floor(times).astype(np.int64), end - 1) - start
+    return np.bincount(minutes, minlength=end - start)
+
+
+@dataclass(slots=True)
+class ArrivalSchedule:
+    """hands out the arrivals of an ArrivalProfile, sampling a whole day at a time."""
+
+    profile: ArrivalProfile
+    day: int = -1
+    times: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    counts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    position: int = 0  # index of the next arrival time handed out by next_arrival
+
+    def sample_day(self, day: int, rng: np.random.Generator) -> None:
+        """samples all arrivals of a day"""
+        start = day * MINUTES_PER_DAY
+        self.day = day
+        self.times = self.profile.sample_arrival_times(start, start + MINUTES_PER_DAY, rng)
+        self.counts = arrivals_per_minute(self.times, start, start + MINUTES_PER_DAY)
+        self.position = 0
+
+    def n_arrivals(self, minute: int, rng: np.random.Generator) -> int:
+        """returns the number of customers arriving in a simulation minute"""
+        if minute // MINUTES_PER_DAY != self.day:
+            self.sample_day(minute // MINUTES_PER_DAY, rng)
+        return int(self.counts[minute % MINUTES_PER_DAY])
+
+    def next_arrival(self, rng: np.random.Generator) -> float:
+        """returns the (continuous) time of the next arrival"""
+        if not self.profile.hourly_rates.any():
+            raise ValueError("No customers arrive with an arrival rate of 0 all day!")
+        while self.position >= len(self.times):
+            self.sample_day(self.day + 1, rng)
+        self.position += 1
+        return float(self.times[self.position - 1])
+
+
+def main(seed: int | None = None) -> None:
+    """Samples one day of arrivals of the configured profile and compares them to the rates"""
+    if Path(config.PATH_ARRIVAL_PROFILE).is_file():
+        profile = ArrivalProfile.from_csv()
+    else:
+        print("No arrival profile found, using the configured constant arrival rate...")
+        profile = ArrivalProfile.constant(mean_arrival_rate(config.CUSTOMER_ARRIVAL_RATE))
+    counts = profile.sample_counts(0, MINUTES_PER_DAY, np.random.default_rng(seed))
+    comparison = pd.DataFrame(
+        {
+            "expected": profile.hourly_rates * 60,
+            "sampled": counts.reshape(24, 60).sum(axis=1),
+        }
+    ).rename_axis("hour")
+    print(comparison.to_string())
+    print(
+        f"{counts.sum()} customer(s) arrived in total,"
+        f" {profile.mean_rate * MINUTES_PER_DAY:.0f} expected."
+    )
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
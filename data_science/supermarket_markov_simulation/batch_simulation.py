@@ -0,0 +1,167 @@
+"""
+Monte Carlo batch runner for the supermarket simulation. Runs many independent replications of
+one or more scenarios (combinations of simulation duration, customer arrival rate and checkout
+staffing) across a process pool. Every replication gets its own random generator spawned from one
+np.random.SeedSequence, so results are reproducible no matter which worker process picks up
+which replication.
+"""
+# Imports
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import product
+from os import cpu_count
+import numpy as np
+import pandas as pd
+from checkout import Checkout, LanePolicy, shortest_queue
+from distributions import Constant, TimeDistribution
+from vectorized_simulation import VectorizedSupermarket
+import config
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """parameters of one simulated supermarket day"""
+
+    duration: int = field(default_factory=lambda: config.SIMULATION_DURATION)
+    arrival_rate: tuple[int, int] = field(default_factory=lambda: config.CUSTOMER_ARRIVAL_RATE)
+    n_lanes: int = 0  # 0 lets customers leave as soon as they reach the checkout
+    service_time: TimeDistribution = Constant(1.0)
+    lane_policy: LanePolicy = shortest_queue
+
+
+@dataclass(slots=True)
+class ReplicationResult:
+    """aggregated outcome of a single simulation run"""
+
+    scenario: Scenario
+    occupancy: np.ndarray  # number of customers in the store per minute
+    time_in_store: np.ndarray  # minutes from entrance to checkout per checked out customer
+    queue_lengths: np.ndarray  # customers per checkout lane and minute
+    waiting_times: np.ndarray  # minutes from joining a lane until being served
+
+    @property
+    def checkouts(self) -> int:
+        """returns the number of customers that reached the checkout"""
+        return len(self.time_in_store)
+
+
+def sweep(
+    durations: list[int, ...],
+    arrival_rates: list[tuple[int, int], ...],
+    n_lanes: list[int, ...] = (0,),
+) -> list[Scenario, ...]:
+    """returns all combinations of durations, arrival rates and checkout lanes as scenarios"""
+    return [
+        Scenario(duration=duration, arrival_rate=arrival_rate, n_lanes=lanes)
+        for duration, arrival_rate, lanes in product(durations, arrival_rates, n_lanes)
+    ]
+
+
+def run_replication(scenario: Scenario, seed: np.random.SeedSequence) -> ReplicationResult:
+    """runs one silent simulation of a scenario and collects its occupancy and checkouts."""
+    checkout = None
+    if scenario.n_lanes:
+        checkout = Checkout(
+            n_lanes=scenario.n_lanes,
+            service_time=scenario.service_time,
+            policy=scenario.lane_policy,
+            rng=np.random.default_rng(seed.spawn(1)[0]),
+        )
+    inst_supermarket = VectorizedSupermarket(
+        verbose=False, with_names=False, rng=np.random.default_rng(seed), checkout=checkout
+    )
+    occupancy = np.zeros(scenario.duration, dtype=np.int64)
+    time_in_store = []
+    for minute in range(scenario.duration):
+        inst_supermarket.next_minute()
+        inst_supermarket.add_new_customers(
+            frequency=scenario.arrival_rate, transition_probs=config.TRANS_PROB_MATRIX
+        )
+        occupancy[minute] = inst_supermarket.n_customers
+        if inst_supermarket.n_customers:
+            time_in_store.append(
+                inst_supermarket.minutes
+                - inst_supermarket.entry_minutes[inst_supermarket.is_exiting]
+            )
+        inst_supermarket.remove_exiting_customers()
+    return ReplicationResult(
+        scenario=scenario,
+        occupancy=occupancy,
+        time_in_store=np.concatenate(time_in_store) if time_in_store else np.empty(0),
+        queue_lengths=checkout.queue_lengths if checkout else np.empty((scenario.duration, 0)),
+        waiting_times=np.array(checkout.waiting_times if checkout else []),
+    )
+
+
+def run_replications(
+    scenarios: list[Scenario, ...],
+    n_replications: int = 100,
+    seed: int | None = None,
+    max_workers: int | None = None,
+) -> list[ReplicationResult, ...]:
+    """runs n_replications of every scenario in parallel worker processes."""
+    tasks = [scenario for scenario in scenarios for _ in range(n_replications)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    chunksize = max(1, len(tasks) // (4 * (max_workers or cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run_replication, tasks, seeds, chunksize=chunksize))
+
+
+def summarize(results: list[ReplicationResult, ...]) -> pd.DataFrame:
+    """aggregates the replications into one summary row per scenario."""
+    by_scenario = {}
+    for result in results:
+        by_scenario.setdefault(result.scenario, []).append(result)
+    summary = []
+    for scenario, scenario_results in by_scenario.items():
+        occupancy = np.stack([result.occupancy for result in scenario_results])
+        checkouts = np.array([result.checkouts for result in scenario_results])
+        time_in_store = np.concatenate([result.time_in_store for result in scenario_results])
+        if not len(time_in_store):
+            time_in_store = np.full(1, np.nan)
+        queue_lengths = np.stack([result.queue_lengths.sum(axis=1) for result in scenario_results])
+        waiting_times = np.concatenate([result.waiting_times for result in scenario_results])
+        if not len(waiting_times):
+            waiting_times = np.full(1, np.nan)
+        summary.append(
+            {
+                "duration": scenario.duration,
+                "arrival_rate": scenario.arrival_rate,
+                "n_lanes": scenario.n_lanes,
+                "lane_policy": scenario.lane_policy.__name__,
+                "replications": len(scenario_results),
+                "checkouts_mean": checkouts.mean(),
+                "checkouts_std": checkouts.std(),
+                "time_in_store_mean": time_in_store.mean(),
+                "time_in_store_p50": np.quantile(time_in_store, 0.5),
+                "time_in_store_p90": np.quantile(time_in_store, 0.9),
+                "occupancy_mean": occupancy.mean(),
+                "occupancy_peak_mean": occupancy.max(axis=1).mean(),
+                "occupancy_per_minute": occupancy.mean(axis=0),
+                "checkout_queue_mean": queue_lengths.mean(),
+                "checkout_queue_peak_mean": queue_lengths.max(axis=1).mean(),
+                "waiting_time_mean": waiting_times.mean(),
+                "waiting_time_p90": np.quantile(waiting_times, 0.9),
+                "checkout_queue_per_minute": queue_lengths.mean(axis=0),
+            }
+        )
+    return pd.DataFrame(summary)
+
+
+def main() -> None:
+    """Runs a batch of replications of the configured scenario and saves the summary"""
+    results = run_replications(
+        scenarios=sweep(
+            [config.SIMULATION_DURATION], [config.CUSTOMER_ARRIVAL_RATE], n_lanes=[0, 1, 2, 3]
+        ),
+        n_replications=100,
+        seed=42,
+    )
+    summary = summarize(results)
+    print(summary.drop(columns=["occupancy_per_minute", "checkout_queue_per_minute"]).to_string())
+    summary.to_pickle(config.output_path(f"batch_simulation_{config.SIMULATION_DURATION}mins.pkl"))
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
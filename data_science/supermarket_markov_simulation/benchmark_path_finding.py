@@ -0,0 +1,86 @@
+"""
+Benchmark of the path finding strategies: expanded cells, path cost and wall time of PathFinder's
+A* and every strategy of search_strategies.py on MARKET and on larger synthetic layouts.
+"""
+# Imports
+import time
+import numpy as np
+import pandas as pd
+from grid import Grid
+from path_finder import PathFinder
+from search_strategies import AStar, BidirectionalAStar, JumpPointSearch, path_cost
+from config import MARKET, UNWALKABLES
+
+STRATEGIES = {
+    "a_star_4 (PathFinder)": None,
+    "bidirectional_a_star_4": BidirectionalAStar(),
+    "a_star_8_octile": AStar(diagonal=True),
+    "bidirectional_a_star_8": BidirectionalAStar(diagonal=True),
+    "jump_point_search_8": JumpPointSearch(),
+}
+
+
+def open_floor(size: int) -> str:
+    """returns a walled, empty square layout with the entrance and exit in opposite corners"""
+    layout = np.full((size, size), ".")
+    layout[[0, -1], :] = layout[:, [0, -1]] = "#"
+    layout[1, 1], layout[-2, -2] = "G", "E"
+    return "\n".join("".join(row) for row in layout)
+
+
+def shelves(size: int) -> str:
+    """returns an open floor with rows of shelves and aisles, like a large supermarket"""
+    layout = np.array([list(row) for row in open_floor(size).split("\n")])
+    for row in range(3, size - 3, 4):
+        for start in range(3, size - 3, 12):
+            layout[row : row + 2, start : min(start + 9, size - 3)] = "#"
+    return "\n".join("".join(row) for row in layout)
+
+
+def random_obstacles(size: int, density: float = 0.2, seed: int = 0) -> str:
+    """returns an open floor with randomly placed obstacles"""
+    layout = np.array([list(row) for row in open_floor(size).split("\n")])
+    obstacles = np.random.default_rng(seed).random((size, size)) < density
+    layout[obstacles & (layout == ".")] = "#"
+    layout[2, 1:3] = layout[1:3, 2] = layout[-3, -3:-1] = layout[-3:-1, -3] = "."
+    return "\n".join("".join(row) for row in layout)
+
+
+def benchmark(layouts: dict[str, str], repeats: int = 3) -> pd.DataFrame:
+    """runs every strategy from G to E of every layout and returns the median wall time"""
+    rows = []
+    for layout_name, layout in layouts.items():
+        grid = Grid.from_layout(layout, UNWALKABLES)
+        for strategy_name, strategy in STRATEGIES.items():
+            wall_times = []
+            for _repeat in range(repeats):
+                path_finder = PathFinder(grid=grid, unwalkables=UNWALKABLES, strategy=strategy)
+                start = time.perf_counter()
+                path = path_finder.search()
+                wall_times.append(time.perf_counter() - start)
+            cells = None if path is None else [x * grid.shape[1] + y for x, y in path]
+            rows.append(
+                {
+                    "layout": layout_name,
+                    "strategy": strategy_name,
+                    "expanded": path_finder.n_expanded,
+                    "path_cost": np.nan if cells is None else path_cost(cells, grid.shape[1]),
+                    "wall_time_ms": 1000 * np.median(wall_times),
+                }
+            )
+    return pd.DataFrame(rows).set_index(["layout", "strategy"])
+
+
+def main() -> None:
+    """Prints the benchmark of MARKET and synthetic 200x200 layouts"""
+    layouts = {
+        "market": MARKET,
+        "open_floor_200": open_floor(200),
+        "shelves_200": shelves(200),
+        "random_obstacles_200": random_obstacles(200),
+    }
+    print(benchmark(layouts).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
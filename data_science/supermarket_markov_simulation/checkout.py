@@ -0,0 +1,89 @@
+"""
+Checkout queueing model with several lanes. Customers reaching the checkout pick a lane via a
+lane selection policy and wait in that lane's FIFO queue until the cashier has served everyone
+in front of them. Service times are drawn from a distribution (see distributions.py). The model
+is advanced in one-minute steps alongside the minute-based simulations and records the queue
+length of every lane after each minute.
+"""
+# Imports
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import numpy as np
+from distributions import Constant, TimeDistribution
+
+
+def shortest_queue(lane_lengths: np.ndarray, rng: np.random.Generator) -> int:
+    """picks the lane with the fewest customers (queueing or being served), the first on ties"""
+    return int(np.argmin(lane_lengths))
+
+
+def random_lane(lane_lengths: np.ndarray, rng: np.random.Generator) -> int:
+    """picks any lane with equal probability"""
+    return int(rng.integers(len(lane_lengths)))
+
+
+LanePolicy = Callable[[np.ndarray, np.random.Generator], int]
+
+
+@dataclass(slots=True)
+class Checkout:
+    """manages n_lanes checkout lanes, each with a cashier and a FIFO queue of customers."""
+
+    n_lanes: int = 3  # one per checkout counter in MARKET
+    service_time: TimeDistribution = Constant(1.0)
+    policy: LanePolicy = shortest_queue
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    queues: list[deque, ...] = field(init=False)  # (customer id, arrival time) per lane
+    remaining: np.ndarray = field(init=False)  # remaining service time of the first customer
+    served: int = 0
+    waiting_times: list[float, ...] = field(default_factory=list)
+    queue_length_history: list[np.ndarray, ...] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.n_lanes < 1:
+            raise ValueError("The checkout needs at least one lane!")
+        self.queues = [deque() for _ in range(self.n_lanes)]
+        self.remaining = np.zeros(self.n_lanes)
+
+    @property
+    def lane_lengths(self) -> np.ndarray:
+        """returns the number of customers per lane including the one being served"""
+        return np.fromiter((len(queue) for queue in self.queues), dtype=np.int64, count=self.n_lanes)
+
+    @property
+    def queue_lengths(self) -> np.ndarray:
+        """returns the lane lengths after every simulated minute as (minutes, lanes) array"""
+        if not self.queue_length_history:
+            return np.empty((0, self.n_lanes), dtype=np.int64)
+        return np.stack(self.queue_length_history)
+
+    def _start_service(self, lane: int, time: float) -> None:
+        """starts serving the first customer of a lane at the given time"""
+        _customer_id, arrival_time = self.queues[lane][0]
+        self.waiting_times.append(time - arrival_time)
+        self.remaining[lane] = self.service_time(self.rng)
+
+    def admit(self, customer_ids: np.ndarray | list[int, ...], minute: int) -> None:
+        """lets customers reaching the checkout at a simulation minute pick a lane"""
+        lane_lengths = self.lane_lengths
+        for customer_id in customer_ids:
+            lane = self.policy(lane_lengths, self.rng)
+            self.queues[lane].append((customer_id, minute))
+            lane_lengths[lane] += 1
+            if lane_lengths[lane] == 1:
+                self._start_service(lane=lane, time=minute)
+
+    def step(self, minute: int) -> None:
+        """serves customers on every lane for the minute starting at the simulation minute"""
+        for lane, queue in enumerate(self.queues):
+            time_left = 1.0
+            while queue and self.remaining[lane] <= time_left:
+                time_left -= self.remaining[lane]
+                queue.popleft()
+                self.served += 1
+                if queue:
+                    self._start_service(lane=lane, time=minute + 1.0 - time_left)
+            if queue:
+                self.remaining[lane] -= time_left
+        self.queue_length_history.append(self.lane_lengths)
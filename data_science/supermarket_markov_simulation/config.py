@@ -1,5 +1,15 @@
-from pandas import read_csv
+"""
+Configuration of the supermarket simulation. Paths, including those of outputs, are resolved
+relative to this folder, so the scripts work from any working directory. Settings can be
+overridden with SUPERMARKET_* environment variables (inherited by worker processes) or, for
+scripts that call apply_cli_overrides(), command line options. The transition matrix is only
+read from disk (and pandas only imported) the first time TRANS_PROB_MATRIX is accessed.
+"""
+from argparse import ArgumentParser
 from enum import Enum
+from functools import lru_cache
+import os
+from pathlib import Path
 
 
 class Locations(Enum):
@@ -16,14 +26,95 @@ class Locations(Enum):
     SPICES = "S"
 
 
-# Paths
-PATH_SUPERMARKETMAP = "images/supermarket.png"
-PATH_TILES = "images/tiles.png"
+PACKAGE_DIR = Path(__file__).resolve().parent
+ENV_PREFIX = "SUPERMARKET_"
+
+
+def _setting(name: str, default: str) -> str:
+    """returns an environment override of a setting or its default"""
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def _load_settings() -> None:
+    """(re)reads all overridable settings into the module namespace"""
+    global PATH_SUPERMARKETMAP, PATH_TILES, PATH_TRANS_PROB_MATRIX, PATH_ARRIVAL_PROFILE
+    global PATH_STORES, PATH_OUTPUT, PATH_ANIMATION
+    global SIMULATION_DURATION, CUSTOMER_ARRIVAL_RATE, VIDEO_FPS, VIDEO_FRAMES_PER_MINUTE
+    # Paths
+    PATH_SUPERMARKETMAP = str(
+        PACKAGE_DIR / _setting("PATH_SUPERMARKETMAP", "images/supermarket.png")
+    )
+    PATH_TILES = str(PACKAGE_DIR / _setting("PATH_TILES", "images/tiles.png"))
+    PATH_TRANS_PROB_MATRIX = str(
+        PACKAGE_DIR / _setting("PATH_TRANS_PROB_MATRIX", "data/transitional_probabilities.csv")
+    )
+    PATH_ARRIVAL_PROFILE = str(
+        PACKAGE_DIR / _setting("PATH_ARRIVAL_PROFILE", "data/arrival_profile.csv")
+    )
+    PATH_STORES = str(PACKAGE_DIR / _setting("PATH_STORES", "stores"))
+    PATH_OUTPUT = str(PACKAGE_DIR / _setting("PATH_OUTPUT", "output"))
+    PATH_ANIMATION = str(PACKAGE_DIR / _setting("PATH_ANIMATION", "images/animation"))
+    # Simulation
+    SIMULATION_DURATION = int(_setting("SIMULATION_DURATION", "20"))  # Duration of simulation
+    CUSTOMER_ARRIVAL_RATE = tuple(  # min max
+        int(value) for value in _setting("CUSTOMER_ARRIVAL_RATE", "0,3").split(",")
+    )
+    # Video export
+    VIDEO_FPS = float(_setting("VIDEO_FPS", "24"))
+    VIDEO_FRAMES_PER_MINUTE = int(_setting("VIDEO_FRAMES_PER_MINUTE", "12"))  # per sim. minute
+
+
+_load_settings()
+
+
+@lru_cache(maxsize=None)
+def load_trans_prob_matrix(path: str):
+    """reads and caches a transition probability matrix"""
+    from pandas import read_csv
+
+    return read_csv(path).set_index("before")
+
+
+def __getattr__(name: str):
+    """loads TRANS_PROB_MATRIX on first access instead of at import"""
+    if name == "TRANS_PROB_MATRIX":
+        return load_trans_prob_matrix(PATH_TRANS_PROB_MATRIX)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def output_path(name: str) -> str:
+    """returns the path of the output file name in PATH_OUTPUT, creating the folder if needed"""
+    Path(PATH_OUTPUT).mkdir(parents=True, exist_ok=True)
+    return str(Path(PATH_OUTPUT) / name)
+
+
+def apply_cli_overrides(argv: list[str, ...] | None = None) -> None:
+    """
+    applies command line overrides, e.g. --simulation-duration 60 --customer-arrival-rate 0,5.
+    They are stored as environment variables, so worker processes started later see them too.
+    Unknown options are an error instead of being ignored.
+    """
+    parser = ArgumentParser()
+    for setting in (
+        "SIMULATION_DURATION",
+        "CUSTOMER_ARRIVAL_RATE",
+        "PATH_TRANS_PROB_MATRIX",
+        "PATH_ARRIVAL_PROFILE",
+        "PATH_SUPERMARKETMAP",
+        "PATH_TILES",
+        "PATH_STORES",
+        "PATH_OUTPUT",
+        "PATH_ANIMATION",
+        "VIDEO_FPS",
+        "VIDEO_FRAMES_PER_MINUTE",
+    ):
+        parser.add_argument(f"--{setting.lower().replace('_', '-')}", dest=setting)
+    args = parser.parse_args(argv)
+    for setting, value in vars(args).items():
+        if value is not None:
+            os.environ[ENV_PREFIX + setting] = value
+    _load_settings()
 
-# Simulation
-SIMULATION_DURATION = 20  # Duration of simulation
-CUSTOMER_ARRIVAL_RATE = (0, 3)  # min max
-TRANS_PROB_MATRIX = read_csv("data/transitional_probabilities.csv").set_index("before")
 
 # Visualization
 MARKET = """
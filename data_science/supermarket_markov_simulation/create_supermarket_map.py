@@ -1,8 +1,102 @@
-from dataclasses import dataclass
+"""
+Renders the supermarket background map from a layout like MARKET and a tile sheet. The tiles of
+all symbols are cut out of the sheet once into a TileAtlas (an array of shape (n_tiles,
+tile_size, tile_size, 3)), the layout is encoded as an array of symbol codes (see grid.Grid) and
+the whole image is composed with one fancy indexing and reshape, so maps of many (large) store
+layouts are rendered without a loop over cells. Rendered maps are cached on disk under a name
+that contains a hash of the layout, tile sheet and tile size (e.g. supermarket.<hash>.png next
+to path_map), so a map is only rendered again when one of them changes and every cache entry is
+written once, atomically. Writing a new entry removes the stale entries of the same path_map.
+The current map is also published at path_map itself, as before.
+"""
+# Imports
+import hashlib
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
 from pathlib import Path
 import numpy as np
 import cv2
-from config import Locations, TILE_SIZE
+from grid import Grid
+import config
+from config import Locations
+
+# (row, col) of the tile of every symbol in the tile sheet, all other symbols are floor
+TILE_COORDS = {
+    Locations.BACKGROUND.value: (1, 2),
+    Locations.ENTRANCE.value: (7, 3),
+    Locations.CHECKOUT.value: (2, 8),
+    Locations.CUSTOMER.value: (7, 0),
+    Locations.EXIT.value: (6, 10),
+    Locations.DAIRY.value: (2, 6),
+    Locations.SPICES.value: (0, 3),
+    Locations.FRUIT.value: (0, 4),
+    Locations.DRINKS.value: (3, 13),
+}
+FLOOR_TILE = (2, 1)
+
+
+@dataclass(frozen=True, eq=False)
+class TileAtlas:
+    """tile images of the map symbols, the last tile is the floor used for unknown symbols."""
+
+    tiles: np.ndarray  # (n_symbols + 1, tile_size, tile_size, 3)
+    symbols: tuple[str, ...]
+
+    @classmethod
+    def from_sheet(
+        cls,
+        sheet: np.ndarray,
+        tile_size: int | None = None,
+        tile_coords: dict[str, tuple[int, int]] | None = None,
+    ) -> "TileAtlas":
+        """cuts the tiles of all symbols (by default of TILE_COORDS) out of a tile sheet"""
+        tile_size = config.TILE_SIZE if tile_size is None else tile_size
+        tile_coords = TILE_COORDS if tile_coords is None else tile_coords
+        n_rows, n_cols = sheet.shape[0] // tile_size, sheet.shape[1] // tile_size
+        rows, cols = np.array([*tile_coords.values(), FLOOR_TILE]).T
+        if rows.max() >= n_rows or cols.max() >= n_cols:
+            raise ValueError(
+                f"The tile sheet of {n_rows}x{n_cols} tiles of size {tile_size} doesn't contain"
+                " all tiles!"
+            )
+        # View the sheet as a (n_rows, n_cols) grid of tiles and pick the tiles of the symbols
+        sheet_tiles = (
+            sheet[: n_rows * tile_size, : n_cols * tile_size]
+            .reshape(n_rows, tile_size, n_cols, tile_size, -1)
+            .swapaxes(1, 2)
+        )
+        return cls(tiles=sheet_tiles[rows, cols], symbols=tuple(tile_coords))
+
+    @property
+    def tile_size(self) -> int:
+        """returns the edge length of the tiles in pixels"""
+        return self.tiles.shape[1]
+
+    def tile(self, symbol: str) -> np.ndarray:
+        """returns the tile of a symbol"""
+        return self.tiles[self.index(symbol)]
+
+    def index(self, symbol: str) -> int:
+        """returns the index of the tile of a symbol (the floor tile for unknown symbols)"""
+        return self.symbols.index(symbol) if symbol in self.symbols else len(self.symbols)
+
+    def render(self, layout: str | list[list[str, ...]] | Grid) -> np.ndarray:
+        """composes the image of a layout from the tiles at once"""
+        grid = layout if isinstance(layout, Grid) else Grid.from_layout(layout)
+        # Translate the grid's symbol codes to tile indices, then look up all tiles at once
+        lookup = np.array([self.index(symbol) for symbol in grid.symbols])
+        tiles = self.tiles[lookup[grid.codes]]  # (n_rows, n_cols, tile_size, tile_size, 3)
+        n_rows, n_cols = grid.shape
+        return tiles.swapaxes(1, 2).reshape(
+            n_rows * self.tile_size, n_cols * self.tile_size, *self.tiles.shape[3:]
+        )
+
+
+def render_layouts(layouts: dict[str, str], atlas: TileAtlas) -> dict[str, np.ndarray]:
+    """renders the maps of several (e.g. store) layouts with the same tiles, keyed like layouts"""
+    return {key: atlas.render(layout) for key, layout in layouts.items()}
 
 
 @dataclass
@@ -13,54 +107,29 @@ class SupermarketMap:
 
     layout: str  # a string with each character representing a tile
     tiles: np.ndarray  # contains all tile images
+    tile_size: int = field(default_factory=lambda: config.TILE_SIZE)
 
     def __post_init__(self):
         # split the layout string into a two dimensional matrix
         self.contents = [list(row) for row in self.layout.split("\n")]
         self.ncols = len(self.contents[0])
         self.nrows = len(self.contents)
-        self.image = np.zeros((self.nrows * TILE_SIZE, self.ncols * TILE_SIZE, 3), dtype=np.uint8)
+        self.atlas = TileAtlas.from_sheet(self.tiles, tile_size=self.tile_size)
         self.prepare_map()
 
     def prepare_map(self):
         """prepares the entire image as a big numpy array"""
-        for row, line in enumerate(self.contents):
-            for col, char in enumerate(line):
-                bm = self.get_tile(char=char)
-                y_coord = row * TILE_SIZE
-                x_coord = col * TILE_SIZE
-                self.image[y_coord : y_coord + TILE_SIZE, x_coord : x_coord + TILE_SIZE] = bm
+        self.image = self.atlas.render(self.contents)
 
     def get_tile(self, char):
         """returns the array for a given tile character"""
-        if char == Locations.BACKGROUND.value:
-            tile_coords = (1, 2)
-        elif char == Locations.ENTRANCE.value:
-            tile_coords = (7, 3)
-        elif char == Locations.CHECKOUT.value:
-            tile_coords = (2, 8)
-        elif char == Locations.CUSTOMER.value:
-            tile_coords = (7, 0)
-        elif char == Locations.EXIT.value:
-            tile_coords = (6, 10)
-        elif char == Locations.DAIRY.value:
-            tile_coords = (2, 6)
-        elif char == Locations.SPICES.value:
-            tile_coords = (0, 3)
-        elif char == Locations.FRUIT.value:
-            tile_coords = (0, 4)
-        elif char == Locations.DRINKS.value:
-            tile_coords = (3, 13)
-        else:  # Floor
-            tile_coords = (2, 1)
-
-        return self.extract_tile(row=tile_coords[0], col=tile_coords[1])
+        return self.atlas.tile(char)
 
     def extract_tile(self, row, col):
         """extract a tile array from the tiles image"""
-        y_coord = row * TILE_SIZE
-        x_coord = col * TILE_SIZE
-        return self.tiles[y_coord : y_coord + TILE_SIZE, x_coord : x_coord + TILE_SIZE]
+        y_coord = row * self.tile_size
+        x_coord = col * self.tile_size
+        return self.tiles[y_coord : y_coord + self.tile_size, x_coord : x_coord + self.tile_size]
 
     def draw(self, frame):
         """draws the image into a frame"""
@@ -71,28 +140,94 @@ class SupermarketMap:
         cv2.imwrite(filename=filename, img=self.image)
 
 
-def main(path_map: str, path_tile: str) -> np.ndarray:
-    """creates a basic supermarket map as background"""
-    if not Path(path_map).is_file():
-        background = np.zeros((500, 700, 3), np.uint8)
-        tiles = cv2.imread(path_tile)
-        market = SupermarketMap(layout=MARKET, tiles=tiles)
-        while True:
-            bg_frame = background.copy()
-            market.draw(frame=bg_frame)
-            # Lookup DEC keys in https://www.ascii-code.com/
-            key = cv2.waitKey(1)
-            if key == 113:  # 'q' key
-                break
-            cv2.imshow("frame", bg_frame)
-        cv2.destroyAllWindows()
-        market.write_image(path_map)
-        market_map = market.image
+def map_key(layout: str, tile_sheet: bytes, tile_size: int) -> str:
+    """returns the hash of everything a rendered map depends on"""
+    digest = hashlib.sha256()
+    for part in (layout, repr(sorted(TILE_COORDS.items())), repr(FLOOR_TILE), str(tile_size)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(tile_sheet)
+    return digest.hexdigest()
+
+
+def cache_path(path_map: str | Path, key: str) -> Path:
+    """returns the path of the cached map with a key, next to path_map"""
+    path_map = Path(path_map)
+    return path_map.with_name(f"{path_map.stem}.{key[:16]}{path_map.suffix}")
+
+
+def publish_map(path_cache: Path, path_map: Path) -> None:
+    """makes path_map show the cached map, as a hard link if possible, else as a copy"""
+    if path_map.is_file() and path_map.samefile(path_cache):
+        return
+    path_tmp = path_map.with_name(f"{path_map.stem}.{os.getpid()}.tmp{path_map.suffix}")
+    try:
+        os.link(path_cache, path_tmp)
+    except OSError:
+        shutil.copyfile(path_cache, path_tmp)
+    os.replace(path_tmp, path_map)
+
+
+def prune_cache(path_cache: Path, path_map: Path) -> None:
+    """removes the cache entries of path_map other than path_cache"""
+    stem, suffix = re.escape(path_map.stem), re.escape(path_map.suffix)
+    entry = re.compile(rf"{stem}\.[0-9a-f]{{16}}{suffix}")
+    for path in path_map.parent.iterdir():
+        if path != path_cache and entry.fullmatch(path.name):
+            path.unlink(missing_ok=True)
+
+
+def load_map(
+    path_map: str | Path, path_tile: str | Path, layout: str, tile_size: int
+) -> tuple[np.ndarray, bool]:
+    """
+    returns the map of a layout and whether it was (re)rendered. The cached map of the key of
+    the layout, tile sheet and tile size is reused if it exists, otherwise it is rendered and
+    cached. Either way, it is published at path_map. No window is opened, so it runs headless.
+    """
+    tile_sheet = Path(path_tile).read_bytes()
+    path_map = Path(path_map)
+    path_cache = cache_path(path_map, map_key(layout, tile_sheet, tile_size))
+    if path_cache.is_file():
+        market_map = cv2.imread(str(path_cache))
+        if market_map is not None:
+            publish_map(path_cache, path_map)
+            return market_map, False
+    tiles = cv2.imdecode(np.frombuffer(tile_sheet, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if tiles is None:
+        raise ValueError(f"Could not decode the tile sheet {path_tile}!")
+    market_map = TileAtlas.from_sheet(tiles, tile_size=tile_size).render(layout)
+    # Write to a temporary file first, so concurrent workers never read a half written map
+    path_cache.parent.mkdir(parents=True, exist_ok=True)
+    path_tmp = path_cache.with_name(f"{path_cache.stem}.{os.getpid()}.tmp{path_cache.suffix}")
+    if not cv2.imwrite(str(path_tmp), market_map):
+        raise ValueError(f"Could not write the map to {path_cache}!")
+    os.replace(path_tmp, path_cache)
+    prune_cache(path_cache, path_map)
+    publish_map(path_cache, path_map)
+    return market_map, True
+
+
+def main(
+    path_map: str,
+    path_tile: str,
+    layout: str | None = None,
+    tile_size: int | None = None,
+) -> np.ndarray:
+    """returns the supermarket map as background, rendering it only if its inputs changed"""
+    market_map, rendered = load_map(
+        path_map,
+        path_tile,
+        layout=config.MARKET if layout is None else layout,
+        tile_size=config.TILE_SIZE if tile_size is None else tile_size,
+    )
+    if rendered:
+        print(f"Rendered the supermarket map to {path_map}...")
     else:
-        print("Supermarket Map is already created, returning the one at path_map...")
-        market_map = cv2.imread(path_map)
+        print(f"Supermarket Map is up to date, returning the one at {path_map}...")
     return market_map
 
 
 if __name__ == "__main__":
-    main()
+    config.apply_cli_overrides()
+    main(path_map=config.PATH_SUPERMARKETMAP, path_tile=config.PATH_TILES)
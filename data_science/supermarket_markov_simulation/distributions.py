@@ -0,0 +1,52 @@
+"""
+Time distributions (in minutes) for dwell and service times. Each distribution is a small frozen
+dataclass called with a np.random.Generator, so it can be hashed, compared and sent to worker
+processes as part of a scenario.
+"""
+# Imports
+from collections.abc import Callable
+from dataclasses import dataclass
+import numpy as np
+
+TimeDistribution = Callable[[np.random.Generator], float]
+
+
+@dataclass(frozen=True, slots=True)
+class Constant:
+    """always takes the given minutes"""
+
+    minutes: float
+
+    def __call__(self, rng: np.random.Generator) -> float:
+        return self.minutes
+
+
+@dataclass(frozen=True, slots=True)
+class Exponential:
+    """exponentially distributed minutes with the given mean"""
+
+    mean: float
+
+    def __call__(self, rng: np.random.Generator) -> float:
+        return rng.exponential(self.mean)
+
+
+@dataclass(frozen=True, slots=True)
+class LogNormal:
+    """lognormally distributed minutes with the given mean and shape sigma"""
+
+    mean: float
+    sigma: float
+
+    def __call__(self, rng: np.random.Generator) -> float:
+        return rng.lognormal(np.log(self.mean) - self.sigma**2 / 2, self.sigma)
+
+
+@dataclass(frozen=True, slots=True)
+class Geometric:
+    """whole minutes until leaving a location that is kept with stay_prob each minute"""
+
+    stay_prob: float
+
+    def __call__(self, rng: np.random.Generator) -> float:
+        return float(rng.geometric(1 - self.stay_prob))
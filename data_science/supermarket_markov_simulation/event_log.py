@@ -0,0 +1,88 @@
+"""
+Columnar, append-only event log for the supermarket simulation. Events are written in batches
+into preallocated NumPy buffers that grow geometrically, and a DataFrame is only materialized
+once when the output is requested.
+"""
+# Imports
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["timestamp", "customer_no", "name", "current_location"]
+
+
+def format_time(minutes: np.ndarray) -> np.ndarray:
+    """returns the HH:MM representation of an array of simulation minutes"""
+    unique_minutes, inverse = np.unique(minutes, return_inverse=True)
+    formatted = np.array(
+        [f"{int(np.floor(minute/60)):02}:{minute%60:02}" for minute in unique_minutes],
+        dtype=object,
+    )
+    return formatted[inverse]
+
+
+@dataclass(slots=True)
+class EventLog:
+    """stores one row per customer and minute in growable column buffers."""
+
+    capacity: int = 1024
+    size: int = 0
+    timestamps: np.ndarray = field(init=False)
+    customer_nos: np.ndarray = field(init=False)
+    names: np.ndarray = field(init=False)
+    locations: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.timestamps = np.empty(self.capacity, dtype=np.int32)
+        self.customer_nos = np.empty(self.capacity, dtype=np.int64)
+        self.names = np.empty(self.capacity, dtype=object)
+        self.locations = np.empty(self.capacity, dtype=object)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, n_rows: int) -> None:
+        """grows all buffers (at least doubling them) so n_rows more rows fit."""
+        if self.size + n_rows <= self.capacity:
+            return
+        self.capacity = max(2 * self.capacity, self.size + n_rows)
+        for column in ("timestamps", "customer_nos", "names", "locations"):
+            old_buffer = getattr(self, column)
+            new_buffer = np.empty(self.capacity, dtype=old_buffer.dtype)
+            new_buffer[: self.size] = old_buffer[: self.size]
+            setattr(self, column, new_buffer)
+
+    def append(
+        self,
+        minute: int,
+        customer_nos: np.ndarray | list[int],
+        names: np.ndarray | list[str],
+        locations: np.ndarray | list[str],
+    ) -> None:
+        """appends one row for each customer at the given simulation minute."""
+        n_rows = len(customer_nos)
+        if not n_rows:
+            return
+        self._reserve(n_rows)
+        rows = slice(self.size, self.size + n_rows)
+        self.timestamps[rows] = minute
+        self.customer_nos[rows] = customer_nos
+        self.names[rows] = names
+        self.locations[rows] = locations
+        self.size += n_rows
+
+    def clear(self) -> None:
+        """drops all rows but keeps the allocated buffers for reuse."""
+        self.size = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """materializes the logged events as a DataFrame with HH:MM timestamps."""
+        return pd.DataFrame(
+            {
+                "timestamp": format_time(self.timestamps[: self.size]),
+                "customer_no": self.customer_nos[: self.size],
+                "name": self.names[: self.size],
+                "current_location": self.locations[: self.size],
+            },
+            columns=COLUMNS,
+        )
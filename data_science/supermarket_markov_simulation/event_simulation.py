@@ -0,0 +1,197 @@
+"""
+Discrete-event simulation of supermarket customer behavior. Instead of touching every customer
+on every one-minute tick, a heap of (time, counter, customer, event) entries is processed in
+time order, so the work scales with the number of location changes rather than with
+customers x minutes, and times are continuous (sub-minute).
+
+How long a customer stays at a location is drawn from a pluggable dwell-time distribution (see
+distributions.py) per Locations entry; where to go next is drawn from the jump chain of the
+transition model (the transition matrix without self-loops). By default the dwell times are
+geometric with the self-loop probabilities of the matrix, which reproduces the minute-based
+simulation. Customers reaching the checkout are served by n_cashiers cashiers at the same time
+and wait in an unbounded FIFO queue while all of them are busy.
+"""
+# Imports
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from itertools import count
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from arrivals import ArrivalSchedule
+from distributions import Constant, Geometric, TimeDistribution
+from markov_analysis import mean_arrival_rate
+from transition_model import TransitionModel
+import config
+from config import Locations
+
+
+class EventType(Enum):
+    """Encapsulates the events a customer can trigger"""
+
+    ARRIVAL = "arrival"
+    TRANSITION = "transition"
+    SERVICE_END = "service_end"
+
+
+@dataclass(slots=True)
+class EventSupermarket:
+    """processes customer events of the supermarket in time order from a heap."""
+
+    transition_probs: pd.DataFrame | TransitionModel = field(
+        default_factory=lambda: config.TRANS_PROB_MATRIX
+    )
+    arrival_rate: float = field(  # customers per minute
+        default_factory=lambda: mean_arrival_rate(config.CUSTOMER_ARRIVAL_RATE)
+    )
+    arrivals: ArrivalSchedule | None = None  # time-varying arrivals instead of arrival_rate
+    dwell_times: dict[Locations, TimeDistribution] = field(default_factory=dict)
+    n_cashiers: int = 3  # customers served at the same time, one per counter in MARKET
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    now: float = 0.0
+    last_id: int = 0
+    transition_model: TransitionModel = field(init=False)
+    jump_cum_probs: np.ndarray = field(init=False)
+    events: list[tuple[float, int, int, EventType], ...] = field(default_factory=list)
+    counter: count = field(default_factory=count)
+    locations: dict[int, int] = field(default_factory=dict)  # customer id -> location code
+    entry_times: dict[int, float] = field(default_factory=dict)
+    checkout_queue: deque = field(default_factory=deque)
+    n_serving: int = 0
+    time_in_store: list[float, ...] = field(default_factory=list)
+    log: list[tuple[float, int, str], ...] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.n_cashiers < 1:
+            raise ValueError("At least one cashier must serve at the checkout!")
+        self.transition_model = TransitionModel.compile(self.transition_probs)
+        if self.transition_model.is_time_dependent:
+            raise ValueError("The event simulation only supports a single transition matrix!")
+        probs = self.transition_model.probs[0]
+        stay_probs = np.diagonal(probs).copy()
+        # Jump chain: where a customer goes once it leaves its current location
+        jump_probs = probs - np.diag(stay_probs)
+        is_absorbing = np.isclose(stay_probs, 1.0)
+        jump_probs[~is_absorbing] /= (1 - stay_probs[~is_absorbing])[:, np.newaxis]
+        jump_probs[is_absorbing, is_absorbing] = 1.0
+        self.jump_cum_probs = np.cumsum(jump_probs, axis=1)
+        self.jump_cum_probs /= self.jump_cum_probs[:, -1:]
+        # Dwell times default to the matrix's self-loops, checkout service to one minute
+        defaults = {
+            Locations[state.upper()]: (
+                Constant(1.0) if is_absorbing[code] else Geometric(stay_probs[code])
+            )
+            for state, code in self.transition_model.codes.items()
+        }
+        self.dwell_times = {**defaults, **self.dwell_times}
+        if self.arrivals is not None:
+            self.schedule(self.arrivals.next_arrival(self.rng), -1, EventType.ARRIVAL)
+        elif self.arrival_rate > 0:
+            self.schedule(self.rng.exponential(1 / self.arrival_rate), -1, EventType.ARRIVAL)
+
+    @property
+    def n_customers(self) -> int:
+        """returns the number of customers currently in the supermarket"""
+        return len(self.locations)
+
+    @property
+    def simulation_output(self) -> pd.DataFrame:
+        """returns every location change as a DataFrame"""
+        return pd.DataFrame(self.log, columns=["timestamp", "customer_no", "current_location"])
+
+    def schedule(self, time: float, customer_id: int, event: EventType) -> None:
+        """puts an event on the heap, the counter keeps equal times in insertion order"""
+        heapq.heappush(self.events, (time, next(self.counter), customer_id, event))
+
+    def dwell_time(self, code: int) -> float:
+        """draws the time spent at a location"""
+        location = Locations[self.transition_model.states[code].upper()]
+        return self.dwell_times[location](self.rng)
+
+    def move(self, customer_id: int, code: int) -> None:
+        """places a customer at a location and logs it"""
+        self.locations[customer_id] = code
+        self.log.append((self.now, customer_id, self.transition_model.states[code]))
+
+    def arrive(self) -> None:
+        """adds a new customer at the entrance and schedules the next arrival"""
+        customer_id = self.last_id
+        self.last_id += 1
+        self.entry_times[customer_id] = self.now
+        entrance = self.transition_model.codes["entrance"]
+        self.move(customer_id, entrance)
+        self.schedule(self.now + self.dwell_time(entrance), customer_id, EventType.TRANSITION)
+        if self.arrivals is not None:
+            self.schedule(self.arrivals.next_arrival(self.rng), -1, EventType.ARRIVAL)
+        else:
+            self.schedule(
+                self.now + self.rng.exponential(1 / self.arrival_rate), -1, EventType.ARRIVAL
+            )
+
+    def transition(self, customer_id: int) -> None:
+        """moves a customer to its next location, at the checkout it queues for service"""
+        next_code = int(
+            np.searchsorted(
+                self.jump_cum_probs[self.locations[customer_id]], self.rng.random(), side="right"
+            )
+        )
+        self.move(customer_id, next_code)
+        if next_code != self.transition_model.codes["checkout"]:
+            self.schedule(self.now + self.dwell_time(next_code), customer_id, EventType.TRANSITION)
+        elif self.n_serving < self.n_cashiers:
+            self.start_service(customer_id)
+        else:
+            self.checkout_queue.append(customer_id)
+
+    def start_service(self, customer_id: int) -> None:
+        """occupies a cashier with a customer until the service ends"""
+        self.n_serving += 1
+        self.schedule(
+            self.now + self.dwell_time(self.transition_model.codes["checkout"]),
+            customer_id,
+            EventType.SERVICE_END,
+        )
+
+    def end_service(self, customer_id: int) -> None:
+        """removes a served customer and serves the next one in the queue"""
+        self.n_serving -= 1
+        del self.locations[customer_id]
+        self.time_in_store.append(self.now - self.entry_times.pop(customer_id))
+        if self.checkout_queue:
+            self.start_service(self.checkout_queue.popleft())
+
+    def run(self, until: float) -> None:
+        """processes all events up to the given simulation time"""
+        while self.events and self.events[0][0] <= until:
+            self.now, _, customer_id, event = heapq.heappop(self.events)
+            if event is EventType.ARRIVAL:
+                self.arrive()
+            elif event is EventType.TRANSITION:
+                self.transition(customer_id)
+            else:
+                self.end_service(customer_id)
+        self.now = until
+
+
+def main(seed: int | None = None) -> None:
+    """Starts the discrete-event supermarket simulation and save its output"""
+    inst_supermarket = EventSupermarket(rng=np.random.default_rng(seed))
+    inst_supermarket.run(until=config.SIMULATION_DURATION)
+    print(
+        f"{inst_supermarket.last_id} customer(s) entered, {len(inst_supermarket.time_in_store)}"
+        f" left and {len(inst_supermarket.checkout_queue)} are waiting at the checkout."
+    )
+    save_str = config.output_path(
+        f"event_simulation_{config.SIMULATION_DURATION}mins_"
+        f"{'-'.join(str(config.CUSTOMER_ARRIVAL_RATE).split('.'))}cpm"
+    )
+    while Path(save_str + ".csv").is_file():
+        save_str += "_new"
+    inst_supermarket.simulation_output.to_csv(save_str + ".csv")
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
@@ -0,0 +1,162 @@
+"""
+Incremental rendering of customer avatars onto the background map. Instead of copying the whole
+background and drawing every avatar one by one each frame, IncrementalRenderer keeps one
+persistent frame and tracks which map tiles changed: only the tiles under avatars that moved,
+appeared or left since the last frame are restored from the background, and only the avatars
+overlapping these tiles are drawn again (clipped to these tiles). Avatars are alpha blended
+instead of overwritten, so overlapping customers stay visible. They are split into layers of
+avatars that don't overlap each other and every layer is blended in one batched NumPy operation
+on (strided) windows of the frame, so the number of NumPy calls depends on how many customers
+overlap, not on the number of customers. Layers also fix the blend order of overlapping avatars:
+an avatar whose layer changed (e.g. because another one left its cell) counts as changed, so
+every frame is the same as a full redraw of all avatars.
+"""
+# Imports
+from dataclasses import dataclass, field
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def overlap_layers(pixels: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    returns a layer per rectangle of size (height, width) at top-left pixels such that no two
+    rectangles of the same layer overlap. Rectangles are binned into cells of their size: those
+    of the same cell get different ranks and those of different cells only overlap if the cells
+    are neighbors, i.e. differ in the parity of their row or column.
+    """
+    if not len(pixels):
+        return np.empty(0, dtype=np.int64)
+    cells = pixels // (height, width)
+    parity = (cells[:, 0] % 2) * 2 + cells[:, 1] % 2
+    # Rank of every rectangle among the rectangles of its cell (in order of appearance)
+    keys = cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    is_first = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    first = np.maximum.accumulate(np.where(is_first, np.arange(len(keys)), 0))
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys)) - first
+    return ranks * 4 + parity
+
+
+@dataclass(slots=True)
+class IncrementalRenderer:
+    """keeps a frame of the background with alpha blended avatars up to date."""
+
+    background: np.ndarray  # (height, width, 3) uint8, a multiple of tile_size in both dims
+    avatar: np.ndarray  # (height, width, 3) BGR or (.., 4) BGRA uint8, at most a tile
+    tile_size: int
+    opacity: float = 0.75  # multiplies the avatar's own alpha channel, if any
+    frame: np.ndarray = field(init=False)
+    windows: np.ndarray = field(init=False)  # writeable avatar sized windows of the frame
+    transparency: np.ndarray = field(init=False)  # (avatar height, width) 1 - alpha
+    premultiplied: np.ndarray = field(init=False)  # (3, avatar height, width) alpha * color
+    ids: np.ndarray = field(init=False)  # customer ids of the drawn avatars, sorted
+    pixels: np.ndarray = field(init=False)  # top-left pixels of the drawn avatars
+    layers: np.ndarray = field(init=False)  # blend layers of the drawn avatars
+
+    def __post_init__(self) -> None:
+        height, width = self.background.shape[:2]
+        if height % self.tile_size or width % self.tile_size:
+            raise ValueError("The background must be a multiple of the tile size in both dims!")
+        if self.avatar.shape[0] > self.tile_size or self.avatar.shape[1] > self.tile_size:
+            raise ValueError("The avatar must not be larger than a tile!")
+        if not 0 < self.opacity <= 1:
+            raise ValueError("The opacity must be in (0, 1]!")
+        alpha = np.full(self.avatar.shape[:2], self.opacity, dtype=np.float32)
+        if self.avatar.shape[2] == 4:
+            alpha *= self.avatar[..., 3] / np.float32(255)
+        self.transparency = 1 - alpha
+        self.premultiplied = (alpha[..., None] * self.avatar[..., :3]).transpose(2, 0, 1)
+        self.frame = self.background.copy()
+        self.windows = sliding_window_view(
+            self.frame, self.avatar.shape[:2], axis=(0, 1), writeable=True
+        )
+        self.ids = np.empty(0, dtype=np.int64)
+        self.pixels = np.empty((0, 2), dtype=np.int64)
+        self.layers = np.empty(0, dtype=np.int64)
+
+    @property
+    def n_tiles(self) -> tuple[int, int]:
+        """returns the number of tile rows and columns of the frame"""
+        return self.frame.shape[0] // self.tile_size, self.frame.shape[1] // self.tile_size
+
+    def _tiles(self, pixels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        returns the (n, 4) tile rows and columns covered by avatars at top-left pixels. An
+        avatar covers at most two tiles per dimension, duplicates are returned if it covers less.
+        """
+        first = pixels // self.tile_size
+        last = (pixels + np.array(self.avatar.shape[:2]) - 1) // self.tile_size
+        rows = np.stack([first[:, 0], first[:, 0], last[:, 0], last[:, 0]], axis=1)
+        cols = np.stack([first[:, 1], last[:, 1], first[:, 1], last[:, 1]], axis=1)
+        return rows, cols
+
+    def render(self, ids: np.ndarray, pixels: np.ndarray) -> np.ndarray:
+        """
+        updates the frame to show the avatars of customers ids at their (y, x) top-left pixels
+        and returns it. The frame is reused by the next call, copy it to keep it.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids)
+        ids = ids[order]
+        # Keep avatars inside the frame
+        max_pixel = np.array(self.frame.shape[:2]) - self.avatar.shape[:2]
+        pixels = np.clip(np.asarray(pixels, dtype=np.int64).reshape(-1, 2)[order], 0, max_pixel)
+        layers = overlap_layers(pixels, *self.avatar.shape[:2])
+        # Avatars that neither moved nor changed layer since the last frame, matched by id
+        previous = np.minimum(np.searchsorted(self.ids, ids), max(len(self.ids) - 1, 0))
+        unchanged = np.zeros(len(ids), dtype=bool)
+        if len(self.ids):
+            unchanged = (
+                (self.ids[previous] == ids)
+                & (self.pixels[previous] == pixels).all(axis=1)
+                & (self.layers[previous] == layers)
+            )
+        kept = np.zeros(len(self.ids), dtype=bool)
+        kept[previous[unchanged]] = True
+        # Tiles under avatars that left or changed and under new or changed avatars
+        dirty = np.zeros(self.n_tiles, dtype=bool)
+        for changed_pixels in (self.pixels[~kept], pixels[~unchanged]):
+            dirty[self._tiles(changed_pixels)] = True
+        self.ids, self.pixels, self.layers = ids, pixels, layers
+        if not dirty.any():
+            return self.frame
+        # Restore the dirty tiles from the background at once
+        tile_rows, tile_cols = np.nonzero(dirty)
+        shape = (self.n_tiles[0], self.tile_size, self.n_tiles[1], self.tile_size, -1)
+        self.frame.reshape(shape)[tile_rows, :, tile_cols] = self.background.reshape(shape)[
+            tile_rows, :, tile_cols
+        ]
+        # Draw all avatars overlapping a dirty tile again, clipped to the dirty tiles. Avatars on
+        # clean tiles kept their layers, so the dirty tiles are blended in the same order as a
+        # full redraw and the clean ones already are.
+        on_dirty = dirty[self._tiles(pixels)]
+        overlapping = on_dirty.any(axis=1)
+        self._blend(
+            pixels[overlapping], layers[overlapping], ~on_dirty[overlapping].all(axis=1), dirty
+        )
+        return self.frame
+
+    def _blend(
+        self, pixels: np.ndarray, layers: np.ndarray, partial: np.ndarray, dirty: np.ndarray
+    ) -> None:
+        """
+        alpha blends avatars at top-left pixels onto the frame, layer by layer. Avatars that are
+        only partially on dirty tiles are masked such that their other pixels stay as they are.
+        """
+        if not len(pixels):
+            return
+        height, width = self.avatar.shape[:2]
+        order = np.argsort(layers, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(layers[order]) != 0])
+        for layer in np.split(order, starts[1:]):
+            rows, cols = pixels[layer, 0], pixels[layer, 1]
+            windows = self.windows[rows, cols]  # (n, 3, height, width) copies
+            blended = np.rint(windows * self.transparency + self.premultiplied).astype(np.uint8)
+            if partial[layer].any():
+                tile_rows = (rows[:, None] + np.arange(height)) // self.tile_size
+                tile_cols = (cols[:, None] + np.arange(width)) // self.tile_size
+                mask = dirty[tile_rows[:, :, None], tile_cols[:, None, :]]
+                blended = np.where(mask[:, None], blended, windows)
+            self.windows[rows, cols] = blended
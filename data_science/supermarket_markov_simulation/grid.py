@@ -0,0 +1,188 @@
+"""
+Compact, immutable representation of the store grid for path finding. The layout is stored once
+as a read-only uint8 array of symbol codes plus a boolean walkability mask, instead of a list of
+lists of mutable cell objects. Searches keep their g-scores and parents in their own scratch
+arrays, so one Grid can be shared by many concurrent searches (threads) and, through shared
+memory, by worker processes without copying the layout. TargetCells holds the candidate end
+cells of "inefficient" customers per location, so they are sampled with one draw, and
+cached_target_cells builds them once per layout.
+"""
+# Imports
+from dataclasses import dataclass, field
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# Symbols customers may walk over even if they are inefficient
+INEFFICIENT_WALKABLES = ("E",)
+
+
+def customer_unwalkables(
+    unwalkables: list[str, ...], store_locations: dict, is_efficient: bool = True
+) -> tuple[str, ...]:
+    """
+    returns the unwalkable symbols of a customer without modifying unwalkables. Inefficient
+    customers don't walk over any location (all location symbols become unwalkable).
+    """
+    if is_efficient:
+        return tuple(dict.fromkeys(unwalkables))
+    extra = [key for key in store_locations if key not in INEFFICIENT_WALKABLES]
+    return tuple(dict.fromkeys([*unwalkables, *extra]))
+
+
+@dataclass(frozen=True, eq=False)
+class Grid:
+    """read-only symbol codes and walkability mask of a rectangular layout."""
+
+    codes: np.ndarray  # (n_rows, n_cols) uint8 index into symbols
+    symbols: tuple[str, ...]
+    unwalkables: tuple[str, ...] = ()
+    walkable: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        codes = np.asarray(self.codes, dtype=np.uint8).view()  # read-only view, not a copy
+        if codes.ndim != 2:
+            raise ValueError("The grid must be two-dimensional!")
+        unwalkable_codes = [
+            code for code, symbol in enumerate(self.symbols) if symbol in self.unwalkables
+        ]
+        walkable = ~np.isin(codes, unwalkable_codes)
+        codes.flags.writeable = False
+        walkable.flags.writeable = False
+        object.__setattr__(self, "codes", codes)
+        object.__setattr__(self, "unwalkables", tuple(self.unwalkables))
+        object.__setattr__(self, "walkable", walkable)
+
+    @classmethod
+    def from_layout(
+        cls, layout: str | list[list[str, ...]], unwalkables: list[str, ...] = ()
+    ) -> "Grid":
+        """encodes a layout like MARKET (or a list of rows of symbols)"""
+        if not isinstance(layout, list):  # if string
+            layout = [list(row) for row in layout.split("\n")]
+        if len({len(row) for row in layout}) != 1:
+            raise ValueError("All rows of the layout must have the same length!")
+        symbols, codes = np.unique(np.array(layout), return_inverse=True)
+        if len(symbols) > 256:
+            raise ValueError("A grid supports at most 256 different symbols!")
+        return cls(
+            codes=codes.reshape(len(layout), -1),
+            symbols=tuple(str(symbol) for symbol in symbols),
+            unwalkables=tuple(unwalkables),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """returns the number of rows and columns"""
+        return self.codes.shape
+
+    @property
+    def n_cells(self) -> int:
+        """returns the number of cells"""
+        return self.codes.size
+
+    def with_unwalkables(self, unwalkables: list[str, ...]) -> "Grid":
+        """returns a grid with the same (shared) codes but other unwalkable symbols"""
+        return Grid(codes=self.codes, symbols=self.symbols, unwalkables=tuple(unwalkables))
+
+    def symbol(self, x_coord: int, y_coord: int) -> str:
+        """returns the symbol of the cell in row x_coord and column y_coord"""
+        return self.symbols[self.codes[x_coord, y_coord]]
+
+    def find(self, symbol: str) -> np.ndarray:
+        """returns the row-major indices of all cells with a symbol"""
+        if symbol not in self.symbols:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.codes == self.symbols.index(symbol))
+
+    def share(self) -> tuple[SharedMemory, "SharedGrid"]:
+        """
+        copies the codes into shared memory and returns the memory (close and unlink it when
+        done) together with a small, picklable handle that worker processes can attach to.
+        """
+        memory = SharedMemory(create=True, size=self.codes.nbytes)
+        np.ndarray(self.shape, dtype=np.uint8, buffer=memory.buf)[:] = self.codes
+        return memory, SharedGrid(
+            name=memory.name, shape=self.shape, symbols=self.symbols, unwalkables=self.unwalkables
+        )
+
+
+@dataclass(frozen=True)
+class SharedGrid:
+    """picklable handle of a Grid whose codes live in shared memory."""
+
+    name: str
+    shape: tuple[int, int]
+    symbols: tuple[str, ...]
+    unwalkables: tuple[str, ...] = ()
+
+    def attach(self) -> tuple[SharedMemory, Grid]:
+        """returns the shared memory (keep it open while using the grid) and the grid on it"""
+        memory = SharedMemory(name=self.name)
+        codes = np.ndarray(self.shape, dtype=np.uint8, buffer=memory.buf)
+        return memory, Grid(codes=codes, symbols=self.symbols, unwalkables=self.unwalkables)
+
+
+@dataclass(frozen=True, eq=False)
+class TargetCells:
+    """candidate end cells (row-major indices) of inefficient customers per location symbol."""
+
+    cells: dict[str, np.ndarray]
+
+    @classmethod
+    def build(cls, grid: Grid, store_locations: dict) -> "TargetCells":
+        """
+        collects the walkable cells in the area of every location that don't show the location's
+        symbol, i.e. the cells next to the shelves. grid should have the customer's unwalkables.
+        """
+        cells = {}
+        for symbol, (x_minmax, y_minmax) in store_locations.items():
+            in_area = np.zeros(grid.shape, dtype=bool)
+            in_area[y_minmax[0] : y_minmax[1] + 1, x_minmax[0] : x_minmax[1] + 1] = True
+            not_symbol = np.ones(grid.shape, dtype=bool)
+            if symbol in grid.symbols:
+                not_symbol = grid.codes != grid.symbols.index(symbol)
+            cells[symbol] = np.flatnonzero(in_area & not_symbol & grid.walkable)
+        return cls(cells=cells)
+
+    def sample(
+        self, symbol: str, rng: np.random.Generator, size: int | None = None
+    ) -> int | np.ndarray:
+        """draws size (or one) uniformly random candidate cell(s) of a location at once"""
+        candidates = self.cells[symbol]
+        if not len(candidates):
+            raise ValueError(
+                f"No target cell found in the area of {symbol}. Consider changing the target area!"
+            )
+        return candidates[rng.integers(len(candidates), size=size)]
+
+
+@lru_cache(maxsize=None)
+def _build_target_cells(
+    codes: bytes,
+    shape: tuple[int, int],
+    symbols: tuple[str, ...],
+    unwalkables: tuple[str, ...],
+    store_locations: tuple[tuple, ...],
+) -> TargetCells:
+    """builds the target cells of a grid given by hashable parts"""
+    grid = Grid(
+        codes=np.frombuffer(codes, dtype=np.uint8).reshape(shape),
+        symbols=symbols,
+        unwalkables=unwalkables,
+    )
+    return TargetCells.build(grid, dict(store_locations))
+
+
+def cached_target_cells(grid: Grid, store_locations: dict) -> TargetCells:
+    """
+    returns the target cells of a grid, built only once per layout, unwalkables and store
+    locations, even if every caller encodes the layout into a new Grid
+    """
+    return _build_target_cells(
+        grid.codes.tobytes(),
+        grid.shape,
+        grid.symbols,
+        grid.unwalkables,
+        tuple(store_locations.items()),
+    )
@@ -0,0 +1,144 @@
+"""
+Analytical solutions for the supermarket Markov chain. Many quantities we would otherwise
+estimate by running the simulation over and over have closed forms given the transition matrix:
+- the stationary distribution, i.e. the left eigenvector of P for eigenvalue 1
+- the fundamental matrix N = (I - Q)^-1 of the transient part Q of P, whose entry (i, j) is the
+  expected number of minutes a customer starting in i spends in j before reaching the checkout
+- the expected time to checkout, i.e. the row sums of N
+- the expected occupancy per location under Poisson arrivals with rate lambda, which by
+  Little's law is lambda times the expected minutes spent in that location
+All functions accept stacks of matrices of shape (..., n_states, n_states), e.g. one per hour.
+"""
+# Imports
+import numpy as np
+import pandas as pd
+from transition_model import TransitionModel
+import config
+
+
+def absorbing_states(probs: np.ndarray) -> np.ndarray:
+    """returns a mask of the states that are absorbing in every matrix of the stack"""
+    n_states = probs.shape[-1]
+    self_loops = np.diagonal(probs, axis1=-2, axis2=-1).reshape(-1, n_states)
+    return np.isclose(self_loops, 1.0).all(axis=0)
+
+
+def stationary_distribution(probs: np.ndarray) -> np.ndarray:
+    """
+    returns the stationary distribution pi (pi @ P = pi, sum(pi) = 1) of every matrix. For the
+    supermarket chain, all mass ends up in the absorbing checkout.
+    """
+    n_states = probs.shape[-1]
+    # Solve (P^T - I) pi = 0 with the last (redundant) equation replaced by sum(pi) = 1
+    system = np.swapaxes(probs, -1, -2) - np.eye(n_states)
+    system[..., -1, :] = 1.0
+    rhs = np.zeros(probs.shape[:-1])
+    rhs[..., -1] = 1.0
+    return np.linalg.solve(system, rhs[..., np.newaxis])[..., 0]
+
+
+def fundamental_matrix(probs: np.ndarray, absorbing: np.ndarray | None = None) -> np.ndarray:
+    """
+    returns N = (I - Q)^-1 restricted to the transient states, where Q holds the transition
+    probabilities among transient states.
+    """
+    absorbing = absorbing_states(probs) if absorbing is None else absorbing
+    transient = np.flatnonzero(~absorbing)
+    transient_probs = probs[..., transient[:, np.newaxis], transient]
+    return np.linalg.inv(np.eye(len(transient)) - transient_probs)
+
+
+def expected_visits(probs: np.ndarray, start: int, absorbing: np.ndarray | None = None) -> np.ndarray:
+    """
+    returns the expected number of minutes a customer starting in state start spends in each
+    state before absorption (0 for absorbing states).
+    """
+    absorbing = absorbing_states(probs) if absorbing is None else absorbing
+    transient = np.flatnonzero(~absorbing)
+    if start not in transient:
+        raise ValueError("The start state must not be absorbing!")
+    visits = np.zeros(probs.shape[:-1])
+    visits[..., transient] = fundamental_matrix(probs, absorbing)[
+        ..., np.flatnonzero(transient == start)[0], :
+    ]
+    return visits
+
+
+def expected_absorption_time(
+    probs: np.ndarray, start: int, absorbing: np.ndarray | None = None
+) -> np.ndarray:
+    """returns the expected number of minutes from state start until reaching an absorbing state"""
+    return expected_visits(probs, start=start, absorbing=absorbing).sum(axis=-1)
+
+
+def expected_occupancy(
+    probs: np.ndarray,
+    arrival_rate: float | np.ndarray,
+    start: int,
+    absorbing: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    returns the long-run expected number of customers per state under Poisson arrivals with
+    arrival_rate customers per minute entering at state start. As in the simulation, a customer
+    is counted in the absorbing state for the one minute before being removed, i.e. with the
+    probability of being absorbed there (the start's row of N @ R, R holding the transition
+    probabilities from transient to absorbing states).
+    """
+    absorbing = absorbing_states(probs) if absorbing is None else absorbing
+    transient = np.flatnonzero(~absorbing)
+    occupancy = expected_visits(probs, start=start, absorbing=absorbing)
+    to_absorbing = probs[..., transient[:, np.newaxis], np.flatnonzero(absorbing)]
+    occupancy[..., absorbing] = np.einsum(
+        "...t,...ta->...a", occupancy[..., transient], to_absorbing
+    )
+    return np.asarray(arrival_rate)[..., np.newaxis] * occupancy
+
+
+def mean_arrival_rate(frequency: tuple[int, int]) -> float:
+    """returns the mean number of arrivals per minute of the simulation's (min, max) frequency"""
+    # rng.integers(low, high) excludes high
+    return (frequency[0] + frequency[1] - 1) / 2
+
+
+def analyze(
+    transition_probs: pd.DataFrame | TransitionModel,
+    arrival_rate: float,
+    start_location: str = "entrance",
+) -> pd.DataFrame:
+    """
+    returns expected visits, stationary probabilities and expected occupancy per location for
+    every matrix of a transition model, plus the expected time to checkout per matrix.
+    """
+    model = TransitionModel.compile(transition_probs)
+    start = model.codes[start_location]
+    visits = expected_visits(model.probs, start=start)
+    analysis = pd.concat(
+        {
+            "expected_minutes": pd.DataFrame(visits, index=model.hours, columns=model.states),
+            "stationary": pd.DataFrame(
+                stationary_distribution(model.probs), index=model.hours, columns=model.states
+            ),
+            "expected_occupancy": pd.DataFrame(
+                expected_occupancy(model.probs, arrival_rate=arrival_rate, start=start),
+                index=model.hours,
+                columns=model.states,
+            ),
+        },
+        axis=1,
+    )
+    analysis["expected_time_to_checkout"] = visits.sum(axis=-1)
+    analysis.index.name = "hour"
+    return analysis
+
+
+def main() -> None:
+    """Prints the analytical solution of the configured supermarket chain"""
+    analysis = analyze(
+        config.TRANS_PROB_MATRIX, arrival_rate=mean_arrival_rate(config.CUSTOMER_ARRIVAL_RATE)
+    )
+    print(analysis.T.to_string())
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
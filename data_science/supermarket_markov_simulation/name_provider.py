@@ -0,0 +1,44 @@
+"""
+Pooled supply of customer names. Creating a Faker instance (which loads all locale providers)
+for every arriving customer dominates the simulation loop, so names are generated in batches
+by one seeded Faker instead and recycled in a ring buffer of fixed size. Customer ids map onto
+the ring, so customers never need to carry their own name string around.
+"""
+# Imports
+from dataclasses import dataclass, field
+import numpy as np
+from faker import Faker
+
+
+@dataclass(slots=True)
+class NamePool:
+    """generates customer names in batches from one seeded Faker and recycles them in a ring."""
+
+    seed: int | None = None
+    pool_size: int = 10_000
+    batch_size: int = 512
+    faker: Faker = field(init=False)
+    names: np.ndarray = field(init=False)
+    n_generated: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        if self.pool_size < 1:
+            raise ValueError("The name pool needs to hold at least one name!")
+        self.faker = Faker()
+        self.faker.seed_instance(self.seed)
+        self.names = np.empty(self.pool_size, dtype=object)
+
+    def _generate(self, n_names: int) -> None:
+        """fills the pool batch by batch until it holds at least n_names names."""
+        while self.n_generated < min(n_names, self.pool_size):
+            batch_end = min(self.n_generated + self.batch_size, self.pool_size)
+            self.names[self.n_generated : batch_end] = [
+                self.faker.name() for _ in range(batch_end - self.n_generated)
+            ]
+            self.n_generated = batch_end
+
+    def names_for(self, customer_ids: int | np.ndarray) -> str | np.ndarray:
+        """returns the name of each customer id, names repeat every pool_size ids."""
+        slots = np.asarray(customer_ids) % self.pool_size
+        self._generate(n_names=int(slots.max(initial=-1)) + 1)
+        return self.names[slots]
@@ -0,0 +1,105 @@
+"""
+Incremental occupancy statistics of the supermarket. Instead of reloading the simulation output
+and grouping it afterwards, the supermarket reports every entry, location change and exit to an
+OccupancyTracker, which keeps running per-location counters (O(1) per transition), a histogram
+of the minutes customers spent in the store and one occupancy snapshot per simulated minute.
+All statistics can be queried at any time during a run.
+"""
+# Imports
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+
+@dataclass(slots=True)
+class OccupancyTracker:
+    """keeps running per-location customer counts and time in store statistics."""
+
+    locations: tuple[str, ...] = ()
+    codes: dict[str, int] = field(default_factory=dict)
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    time_in_store_counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    snapshot_minutes: list[int, ...] = field(default_factory=list)
+    snapshot_counts: list[np.ndarray, ...] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.locations:
+            self.set_locations(self.locations)
+
+    def set_locations(self, locations: tuple[str, ...]) -> None:
+        """sets the tracked location names (in the order of their integer codes) once."""
+        if len(self.counts) and tuple(locations) != self.locations:
+            raise ValueError("The tracked locations cannot change during a simulation!")
+        if len(self.counts):
+            return
+        self.locations = tuple(locations)
+        self.codes = {location: code for code, location in enumerate(self.locations)}
+        self.counts = np.zeros(len(self.locations), dtype=np.int64)
+
+    def enter(self, code: int, n_customers: int = 1) -> None:
+        """counts customers entering the store at a location"""
+        self.counts[code] += n_customers
+
+    def move(self, from_code: int, to_code: int) -> None:
+        """counts one customer changing its location"""
+        self.counts[from_code] -= 1
+        self.counts[to_code] += 1
+
+    def move_many(self, from_codes: np.ndarray, to_codes: np.ndarray) -> None:
+        """counts many customers changing their locations at once"""
+        n_locations = len(self.locations)
+        self.counts -= np.bincount(from_codes, minlength=n_locations)
+        self.counts += np.bincount(to_codes, minlength=n_locations)
+
+    def exit(self, code: int, minutes_in_store: int) -> None:
+        """counts one customer leaving the store from a location"""
+        self.exit_many(np.array([code]), np.array([minutes_in_store]))
+
+    def exit_many(self, codes: np.ndarray, minutes_in_store: np.ndarray) -> None:
+        """counts many customers leaving the store at once"""
+        if not len(codes):
+            return
+        self.counts -= np.bincount(codes, minlength=len(self.locations))
+        histogram = np.bincount(minutes_in_store)
+        if len(histogram) > len(self.time_in_store_counts):
+            self.time_in_store_counts = np.pad(
+                self.time_in_store_counts, (0, len(histogram) - len(self.time_in_store_counts))
+            )
+        self.time_in_store_counts[: len(histogram)] += histogram
+
+    def snapshot(self, minute: int) -> None:
+        """stores the current per-location counts for a simulation minute"""
+        self.snapshot_minutes.append(minute)
+        self.snapshot_counts.append(self.counts.copy())
+
+    @property
+    def current(self) -> pd.Series:
+        """returns the number of customers per location right now"""
+        return pd.Series(self.counts, index=list(self.locations), name="customers")
+
+    @property
+    def history(self) -> pd.DataFrame:
+        """returns the per-location counts of every snapshot (one row per minute)"""
+        return pd.DataFrame(
+            np.array(self.snapshot_counts, dtype=np.int64).reshape(-1, len(self.locations)),
+            index=pd.Index(self.snapshot_minutes, name="minute"),
+            columns=list(self.locations),
+        )
+
+    @property
+    def time_in_store_histogram(self) -> pd.Series:
+        """returns how many customers left after each number of minutes in the store"""
+        return pd.Series(self.time_in_store_counts, name="customers").rename_axis("minutes")
+
+    @property
+    def n_exited(self) -> int:
+        """returns the number of customers that left the store"""
+        return int(self.time_in_store_counts.sum())
+
+    @property
+    def mean_time_in_store(self) -> float:
+        """returns the mean minutes spent in the store by customers that left"""
+        if not self.n_exited:
+            return np.nan
+        minutes = np.arange(len(self.time_in_store_counts))
+        return float((minutes * self.time_in_store_counts).sum() / self.n_exited)
@@ -15,169 +15,181 @@ but only if they are roughly going towards the end node (small g's relative to s
 """
 import heapq
 from dataclasses import dataclass, field
-from random import randint
 from enum import Enum
+from itertools import count
+import numpy as np
+from grid import Grid, TargetCells, cached_target_cells, customer_unwalkables
+from search_strategies import SearchStrategy
 from config import Locations, STORE_LOCATIONS, MARKET, UNWALKABLES
 
 
 @dataclass
-class Cell:
+class PathFinder:
     """
-    Holds information about a cell in a 2D map.
+    Performs path finding process using the heapq module. Cells are integer indices into the
+    row-major flattened grid (index = x_coord * n_cols + y_coord). The grid is never modified,
+    so a Grid can be passed to (and shared by) many path finders.
     """
 
-    x_coord: int
-    y_coord: int
-    symbol: int
-    g_shortest_distance: int = 0  # shortest distance from current to end cell
-    h_best_guess_heuristic: int = 0  # best guess distance estimate from current to end cell
-    f_added_g_h: int = 0  # combined g and h
-    parent: bool = None
-
-    def __lt__(self, other):
-        """
-        Enable lt dunder method since heapq compares values in a sorted list. @dataclass(Order=True)
-        won't work since the __lt__ comparison is different. This will result in the path costs being
-        reduced for the total path which will result in longer, inefficient paths to the target.
-        """
-        return self.f_added_g_h < other.f_added_g_h
-
-
-@dataclass
-class PathFinder:
-    """Performs path finding process using the heapq module."""
-
-    grid: str | list[list[str], ...]
+    grid: str | list[list[str], ...] | Grid
     unwalkables: list[str, ...]
     start_symbol: str = "G"
     end_symbol: str = "E"
     store_locations: dict[Enum, ...] = field(default_factory=dict)
     is_efficient: bool = True
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    target_cells: TargetCells | None = None  # cached per grid and store_locations if None
+    strategy: SearchStrategy | None = None  # e.g. JumpPointSearch(), None runs the A* below
 
     def __post_init__(self) -> None:
-        if not isinstance(self.grid, list):  # if string
-            self.grid = [list(row) for row in self.grid.split("\n")]
-        # Grid must be a 2D list of n by m Cell objects with x,y coordinates and the cell's symbol.
-        self.grid = [
-            [Cell(x_coord, y_coord, symbol) for y_coord, symbol in enumerate(row)]
-            for x_coord, row in enumerate(self.grid)
-        ]
+        if not isinstance(self.grid, Grid):
+            self.grid = Grid.from_layout(self.grid)
+        self.n_rows, self.n_cols = self.grid.shape
+        # The walkability mask of this search, the shared unwalkables are never modified
+        unwalkables = customer_unwalkables(
+            self.unwalkables, self.store_locations, is_efficient=self.is_efficient
+        )
+        if set(self.grid.unwalkables) != set(unwalkables):
+            self.grid = self.grid.with_unwalkables(unwalkables)
+        self.walkable = self.grid.walkable.ravel()
         self.start_cell, self.end_cell = self._find_start_end()
-        # If customer is inefficient, extend unwalkables (all symbols become unwalkable)
-        if not self.is_efficient:
-            self.unwalkables.extend([key for key in self.store_locations if key != "E"])
+        self.n_expanded = 0  # cells expanded by the last search
 
-    def _find_start_end(self) -> tuple[Cell, Cell]:
+    def _find_start_end(self) -> tuple[int, int]:
         """Defines start and end cells depending on efficiency of customer."""
         #! This method has complex logic and could be improved.
         # Search the grid for the start and, if customer enter or exits or is efficient, end_cell
-        for row in self.grid:
-            for cell in row:
-                if cell.symbol == self.start_symbol:
-                    start_cell = cell
-                # Customers that are efficient or enter/exit, move directly to target location
-                if cell.symbol == self.end_symbol and (
-                    self.end_symbol in [Locations.ENTRANCE.value, Locations.EXIT.value]
-                    or self.is_efficient
-                ):
-                    end_cell = cell
+        start_cell = end_cell = None
+        start_cells, end_cells = self.grid.find(self.start_symbol), self.grid.find(self.end_symbol)
+        if len(start_cells):
+            start_cell = int(start_cells[-1])
+        # Customers that are efficient or enter/exit, move directly to target location
+        if len(end_cells) and (
+            self.end_symbol in [Locations.ENTRANCE.value, Locations.EXIT.value] or self.is_efficient
+        ):
+            end_cell = int(end_cells[-1])
         # Search end_cell for inefficient customers, who don't enter or exit. They move in the
         # general area of the target location: one and only one cell next to any target symbol.
         if not self.is_efficient and self.end_symbol not in [
             Locations.ENTRANCE.value,
             Locations.EXIT.value,
         ]:
-            if self.store_locations:
-                x_minmax, y_minmax = self.store_locations[self.end_symbol]
-                attempts = 0
-                while attempts <= 500:
-                    target_x = randint(x_minmax[0], x_minmax[1])
-                    target_y = randint(y_minmax[0], y_minmax[1])
-                    if self.grid[target_y][target_x].symbol != self.end_symbol:
-                        end_cell = self.grid[target_y][target_x]
-                        break
-                    attempts += 1
-                else:
-                    raise ValueError(
-                        "Failed to find target location after 500 attempts. Consider reducing"
-                        " the target area!"
-                    )
-            else:
+            if not self.store_locations:
                 raise ValueError("Store locations dictionary is empty. Did you provide one?")
-        if not start_cell or not end_cell:
+            if self.target_cells is None:
+                self.target_cells = cached_target_cells(self.grid, self.store_locations)
+            end_cell = int(self.target_cells.sample(self.end_symbol, self.rng))
+        if start_cell is None or end_cell is None:
             raise Exception("Start or end cell not found !")
         return start_cell, end_cell
 
-    def heuristic(self, cell: Cell, target: Cell) -> None:
+    def coords(self, cell: int) -> tuple[int, int]:
+        """Returns the x,y coordinates of a cell index"""
+        return divmod(int(cell), self.n_cols)
+
+    def heuristic(self, cell: int, target: int) -> int:
         """
         Calculates the heuristic costs of a cell using the Manhattan Distance formula defined
         as sum of absolute differences of x and y between current and target cell
         """
-        return abs(cell.x_coord - target.x_coord) + abs(cell.y_coord - target.y_coord)
+        cell_x, cell_y = divmod(cell, self.n_cols)
+        target_x, target_y = divmod(target, self.n_cols)
+        return abs(cell_x - target_x) + abs(cell_y - target_y)
 
-    def get_neighbors(self, cell: Cell) -> list[Cell, ...]:
+    def get_neighbors(self, cell: int) -> list[int, ...]:
         """Returns a list of immediately adjacent cells relative to the current cell"""
+        x_coord, y_coord = divmod(cell, self.n_cols)
         neighbors = []
-        if cell.x_coord > 0:  # left
-            neighbors.append(self.grid[cell.x_coord - 1][cell.y_coord])
-        if cell.x_coord < len(self.grid) - 1:  # right
-            neighbors.append(self.grid[cell.x_coord + 1][cell.y_coord])
-        if cell.y_coord > 0:  # top
-            neighbors.append(self.grid[cell.x_coord][cell.y_coord - 1])
-        if cell.y_coord < len(self.grid[0]) - 1:  # bottom
-            neighbors.append(self.grid[cell.x_coord][cell.y_coord + 1])
+        if x_coord > 0:  # left
+            neighbors.append(cell - self.n_cols)
+        if x_coord < self.n_rows - 1:  # right
+            neighbors.append(cell + self.n_cols)
+        if y_coord > 0:  # top
+            neighbors.append(cell - 1)
+        if y_coord < self.n_cols - 1:  # bottom
+            neighbors.append(cell + 1)
         return neighbors
 
-    def reached_end(self, current_cell) -> list[tuple, ...]:
+    def reached_end(self, current_cell: int, parents: np.ndarray) -> list[tuple, ...]:
         """
         Creates the path to the current cell by retracing the parent cells.
         Assumes current cell is target cell.
         """
         path = []
-        while current_cell.parent:
-            path.append((current_cell.x_coord, current_cell.y_coord))
-            current_cell = current_cell.parent
-        path.append((current_cell.x_coord, current_cell.y_coord))
+        while current_cell != -1:
+            path.append(self.coords(current_cell))
+            current_cell = parents[current_cell]
         path.reverse()
         return path
 
+    def search(self) -> list[tuple[int, int], ...] | None:
+        """
+        Runs A* from the start to the end cell. The open set is a heap of (f, counter, cell)
+        entries: the counter breaks ties of f in insertion order, and an improved cell is simply
+        pushed again while its outdated entries are skipped once popped (lazy deletion).
+        If a strategy is set, the search is delegated to it instead.
+        """
+        if self.strategy is not None:
+            result = self.strategy(self.grid.walkable, self.start_cell, self.end_cell)
+            self.n_expanded = result.n_expanded
+            return None if result.path is None else [self.coords(cell) for cell in result.path]
+        self.n_expanded = 0
+        n_cells = self.n_rows * self.n_cols
+        closed = np.zeros(n_cells, dtype=bool)
+        g_scores = np.full(n_cells, np.iinfo(np.int64).max, dtype=np.int64)
+        parents = np.full(n_cells, -1, dtype=np.int64)
+        counter = count()
+        g_scores[self.start_cell] = 0
+        start_f_score = self.heuristic(self.start_cell, self.end_cell)
+        open_set = [(start_f_score, next(counter), self.start_cell)]
+        while open_set:
+            # Pop the cell with lowest f score from open set, skipping outdated entries
+            _f_score, _, current_cell = heapq.heappop(open_set)
+            if closed[current_cell]:
+                continue
+            closed[current_cell] = True
+            self.n_expanded += 1
+            if current_cell == self.end_cell:
+                return self.reached_end(current_cell=current_cell, parents=parents)
+            self.evaluate_neighbors(current_cell, open_set, closed, g_scores, parents, counter)
+        return None
+
     def evaluate_neighbors(
         self,
-        current_cell: Cell,
-        end_cell: Cell,
-        open_set: list[Cell, ...],
-        closed_set: list[Cell, ...],
+        current_cell: int,
+        open_set: list[tuple[int, int, int], ...],
+        closed: np.ndarray,
+        g_scores: np.ndarray,
+        parents: np.ndarray,
+        counter: count,
     ) -> None:
         """Evaluates the neighbors by updating the heuristics and costs of a chosen, valid move."""
         # Check neighbors of current cell for validity (i.e., obstacle or already explored).
-        # If valid, calculate tentative movement cost to inform decision on parent cell.
+        # If the tentative movement cost is lower than the best known one, the current cell
+        # becomes the neighbor's parent and the neighbor is (re)added to the open set.
+        tentative_cost_path = g_scores[current_cell] + 1
         for neighbor in self.get_neighbors(current_cell):
-            if neighbor.symbol in self.unwalkables or neighbor in closed_set:
+            if not self.walkable[neighbor] or closed[neighbor]:
                 continue
-            tentative_cost_path = current_cell.g_shortest_distance + 1
-            # If neighbor cell is still not fully explored (in open set) or if tentative_cost_path
-            # are lower than g_shortest_distance score of the current cell, make it a parent cell
-            # and add it to the open set, if isn't already.
-            if (neighbor not in open_set) or (tentative_cost_path < neighbor.g_shortest_distance):
-                neighbor.g_shortest_distance = tentative_cost_path
-                neighbor.h_best_guess_heuristic = self.heuristic(cell=neighbor, target=end_cell)
-                neighbor.f_added_g_h = (
-                    neighbor.g_shortest_distance + neighbor.h_best_guess_heuristic
-                )
-                neighbor.parent = current_cell
-                if neighbor not in open_set:
-                    heapq.heappush(open_set, neighbor)
+            if tentative_cost_path < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_cost_path
+                parents[neighbor] = current_cell
+                f_score = tentative_cost_path + self.heuristic(neighbor, self.end_cell)
+                heapq.heappush(open_set, (f_score, next(counter), neighbor))
 
 
 def main(
-    grid: str | list[list[str, ...]],
+    grid: str | list[list[str, ...]] | Grid,
     unwalkables: list[str, ...],
     start_symbol: str,
     end_symbol: str,
     store_locations: dict,
     is_efficient: bool = True,
+    rng: np.random.Generator | None = None,
+    target_cells: TargetCells | None = None,
+    strategy: SearchStrategy | None = None,
 ) -> list[tuple[int, int], ...]:
-    """Initializes heapq and runs a A* search from a starting to an end cell."""
+    """Runs a A* search from a starting to an end cell."""
     instance_pathfinder = PathFinder(
         grid=grid,
         unwalkables=unwalkables,
@@ -185,21 +197,11 @@ def main(
         end_symbol=end_symbol,
         store_locations=store_locations,
         is_efficient=is_efficient,
+        rng=np.random.default_rng() if rng is None else rng,
+        target_cells=target_cells,
+        strategy=strategy,
     )
-    open_set, closed_set = [], []
-    heapq.heappush(open_set, instance_pathfinder.start_cell)
-    while open_set:
-        # Pop the cell with lowest f_added_g_h score from open set and add it to closed_set
-        current_cell = heapq.heappop(open_set)
-        closed_set.append(current_cell)
-        if current_cell == instance_pathfinder.end_cell:
-            return instance_pathfinder.reached_end(current_cell=current_cell)
-        instance_pathfinder.evaluate_neighbors(
-            current_cell=current_cell,
-            end_cell=instance_pathfinder.end_cell,
-            open_set=open_set,
-            closed_set=closed_set,
-        )
+    return instance_pathfinder.search()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+"""
+Cached shortest paths of the store grid. The MARKET grid never changes during a simulation, so
+instead of running A* for every customer every minute, one breadth-first search per target cell
+is run once, the first time a path to the target is looked up (all new targets of a batch at the
+same time, layer by layer on NumPy arrays), and the resulting distances and next hops are kept
+in two (targets x cells) arrays. Customers only walk to location cells and to the candidate
+cells of the location areas, so the table holds far fewer rows than an all-pairs table. Grids
+larger than MAX_TABLE_CELLS don't keep any rows: paths_to_goals groups every batch by goal and
+only searches from its distinct goals.
+Any path is then reconstructed by following the next hops from the start to the end cell, and
+the paths of many customers are reconstructed together in lockstep.
+Cells are indexed row-major (row * n_cols + col) and paths are lists of (row, col) tuples as
+returned by path_finder.
+"""
+# Imports
+from dataclasses import dataclass, field
+from functools import lru_cache
+import time
+import numpy as np
+from grid import Grid, TargetCells, customer_unwalkables
+from config import Locations, STORE_LOCATIONS, MARKET, UNWALKABLES
+
+# Neighbor offsets (row, col) in the order of PathFinder.get_neighbors
+NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# Grids with more cells don't keep a table, every batch only searches its own goals
+MAX_TABLE_CELLS = 10_000
+
+
+def search_targets(grid: Grid, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    runs one breadth-first search per target cell (row-major index), all of them at the same
+    time, and returns the (n_targets, n_cells) distances and next hops to the targets
+    """
+    walkable = grid.walkable
+    n_rows, n_cols = grid.shape
+    # Search backwards from all targets at once: a cell reached in step k is k steps away.
+    # Only walkable cells are expanded, but unwalkable cells (e.g. the entrance) can still
+    # be the start of a path.
+    distances = np.full((len(targets), n_rows, n_cols), -1, dtype=np.int16)
+    distances.reshape(len(targets), -1)[np.arange(len(targets)), targets] = 0
+    frontier = distances == 0
+    step = 0
+    while frontier.any():
+        step += 1
+        expanded = frontier & walkable
+        reached = np.zeros_like(expanded)
+        reached[:, 1:, :] |= expanded[:, :-1, :]
+        reached[:, :-1, :] |= expanded[:, 1:, :]
+        reached[:, :, 1:] |= expanded[:, :, :-1]
+        reached[:, :, :-1] |= expanded[:, :, 1:]
+        frontier = reached & (distances < 0)
+        distances[frontier] = step
+    # The next hop is the first walkable neighbor that is one step closer to the target
+    cells = np.arange(grid.n_cells).reshape(n_rows, n_cols)
+    next_hops = np.full(distances.shape, -1, dtype=np.int32)
+    for row_offset, col_offset in reversed(NEIGHBOR_OFFSETS):
+        neighbor_distances = np.full(distances.shape, -1, dtype=np.int16)
+        neighbor_walkable = np.zeros(walkable.shape, dtype=bool)
+        rows = slice(max(-row_offset, 0), n_rows - max(row_offset, 0))
+        cols = slice(max(-col_offset, 0), n_cols - max(col_offset, 0))
+        neighbor_rows = slice(rows.start + row_offset, rows.stop + row_offset)
+        neighbor_cols = slice(cols.start + col_offset, cols.stop + col_offset)
+        neighbor_distances[:, rows, cols] = distances[:, neighbor_rows, neighbor_cols]
+        neighbor_walkable[rows, cols] = walkable[neighbor_rows, neighbor_cols]
+        is_closer = (distances > 0) & (neighbor_distances == distances - 1) & neighbor_walkable
+        next_hops[is_closer] = np.broadcast_to(
+            cells + row_offset * n_cols + col_offset, distances.shape
+        )[is_closer]
+    return distances.reshape(len(targets), -1), next_hops.reshape(len(targets), -1)
+
+
+@dataclass(eq=False)
+class PathTable:
+    """
+    shortest path distances and next hops from every cell to the target cells searched so far.
+    A target is searched the first time a path to it is looked up.
+    """
+
+    grid: Grid
+    target_rows: np.ndarray  # row of every cell in distances/next_hops, -1 if not searched yet
+    distances: np.ndarray  # (n_targets, n_cells) steps from a cell to a target, -1 if unreachable
+    next_hops: np.ndarray  # (n_targets, n_cells) next cell on the way to a target, -1 if none
+    n_cols: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.n_cols = self.grid.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        grid: str | list[list[str, ...]] | Grid,
+        unwalkables: list[str, ...] | None = None,
+        targets: np.ndarray | None = None,
+    ) -> "PathTable":
+        """
+        returns the table of a grid with the target cells (row-major index) searched, by default
+        none, i.e. all targets are searched on first use. unwalkables override those of a Grid.
+        """
+        if not isinstance(grid, Grid):
+            grid = Grid.from_layout(grid, unwalkables or [])
+        elif unwalkables is not None:
+            grid = grid.with_unwalkables(unwalkables)
+        table = cls(
+            grid=grid,
+            target_rows=np.full(grid.n_cells, -1, dtype=np.int32),
+            distances=np.empty((0, grid.n_cells), dtype=np.int16),
+            next_hops=np.empty((0, grid.n_cells), dtype=np.int32),
+        )
+        if targets is not None:
+            table.add_targets(targets)
+        return table
+
+    def add_targets(self, targets: np.ndarray) -> None:
+        """searches the target cells (row-major index) that weren't searched yet"""
+        targets = np.unique(targets)
+        targets = targets[self.target_rows[targets] < 0]
+        if not len(targets):
+            return
+        distances, next_hops = search_targets(self.grid, targets)
+        self.target_rows[targets] = len(self.distances) + np.arange(len(targets))
+        self.distances = np.concatenate([self.distances, distances])
+        self.next_hops = np.concatenate([self.next_hops, next_hops])
+
+    def cell_index(self, cell: tuple[int, int]) -> int:
+        """returns the row-major index of a (row, col) cell"""
+        return cell[0] * self.n_cols + cell[1]
+
+    def distance(self, start: tuple[int, int], end: tuple[int, int]) -> int:
+        """returns the number of steps from start to end, -1 if end is unreachable"""
+        if start == end:
+            return 0
+        self.add_targets([self.cell_index(end)])
+        return int(self.distances[self.target_rows[self.cell_index(end)], self.cell_index(start)])
+
+    def path(self, start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int], ...]:
+        """returns the cells of a shortest path from start to end, both included"""
+        return self.paths([start], [end])[0]
+
+    def paths(
+        self, starts: list[tuple[int, int], ...], ends: list[tuple[int, int], ...]
+    ) -> list[list[tuple[int, int], ...], ...]:
+        """returns shortest paths for many (start, end) pairs, walking all of them in lockstep"""
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2) @ [self.n_cols, 1]
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2) @ [self.n_cols, 1]
+        if not len(starts):
+            return []
+        self.add_targets(ends[starts != ends])
+        target_rows = self.target_rows[ends]
+        lengths = np.where(starts == ends, 0, -1)
+        is_known = (target_rows >= 0) & (starts != ends)
+        lengths[is_known] = self.distances[target_rows[is_known], starts[is_known]]
+        if np.any(lengths < 0):
+            unreachable = np.flatnonzero(lengths < 0)[0]
+            raise ValueError(
+                f"No path from {divmod(int(starts[unreachable]), self.n_cols)} to"
+                f" {divmod(int(ends[unreachable]), self.n_cols)}!"
+            )
+        steps = np.empty((len(starts), lengths.max() + 1), dtype=np.int64)
+        steps[:, 0] = cells = starts
+        for step in range(1, lengths.max() + 1):
+            cells = np.where(step <= lengths, self.next_hops[target_rows, cells], cells)
+            steps[:, step] = cells
+        rows, cols = np.divmod(steps, self.n_cols)
+        return [
+            list(zip(rows[agent, : length + 1].tolist(), cols[agent, : length + 1].tolist()))
+            for agent, length in enumerate(lengths)
+        ]
+
+    def find_cell(self, symbol: str) -> tuple[int, int]:
+        """returns the last cell of the grid with a symbol, as PathFinder does"""
+        cells = self.grid.find(symbol)
+        if not len(cells):
+            raise ValueError(f"Symbol {symbol} not found in the grid!")
+        return divmod(int(cells[-1]), self.n_cols)
+
+
+@lru_cache(maxsize=None)
+def get_path_table(grid: str, unwalkables: tuple[str, ...]) -> PathTable:
+    """builds the path table of a grid once and returns the cached table afterwards"""
+    return PathTable.build(grid, list(unwalkables))
+
+
+def paths_to_goals(
+    grid: str | list[list[str, ...]] | Grid,
+    unwalkables: list[str, ...] | None,
+    starts: list[tuple[int, int], ...],
+    goals: list[tuple[int, int], ...],
+) -> list[list[tuple[int, int], ...], ...]:
+    """
+    returns shortest paths for many (start, goal) pairs of (row, col) cells without keeping a
+    table. Pairs are grouped by goal, i.e. one backwards breadth-first search runs per distinct
+    goal (not per pair), and all paths are extracted from those searches at once.
+    """
+    if not len(goals):
+        return []
+    if not isinstance(grid, Grid):
+        grid = Grid.from_layout(grid, unwalkables or [])
+    elif unwalkables is not None:
+        grid = grid.with_unwalkables(unwalkables)
+    goal_cells = np.asarray(goals, dtype=np.int64).reshape(-1, 2) @ [grid.shape[1], 1]
+    return PathTable.build(grid, targets=goal_cells).paths(starts, goals)
+
+
+@lru_cache(maxsize=None)
+def get_target_cells(
+    grid: str, unwalkables: tuple[str, ...], store_locations: tuple[tuple, ...]
+) -> TargetCells:
+    """collects the candidate end cells of inefficient customers once per grid"""
+    return TargetCells.build(get_path_table(grid, unwalkables).grid, dict(store_locations))
+
+
+def pick_cells(
+    table: PathTable,
+    start_symbols: list[str, ...],
+    end_symbols: list[str, ...],
+    target_cells: TargetCells | None,
+    is_efficient: bool,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    picks the (row, col) start and end cells of many customers in the same way as path_finder,
+    the end cells of inefficient customers are drawn with one draw per target location.
+    """
+    start_symbols, end_symbols = np.asarray(start_symbols), np.asarray(end_symbols)
+    starts = np.empty(len(start_symbols), dtype=np.int64)
+    ends = np.empty(len(end_symbols), dtype=np.int64)
+    for symbol in dict.fromkeys(start_symbols.tolist()):
+        starts[start_symbols == symbol] = table.cell_index(table.find_cell(symbol))
+    for symbol in dict.fromkeys(end_symbols.tolist()):
+        is_symbol = end_symbols == symbol
+        if is_efficient or symbol in [Locations.ENTRANCE.value, Locations.EXIT.value]:
+            ends[is_symbol] = table.cell_index(table.find_cell(symbol))
+        elif target_cells is None:
+            raise ValueError("Store locations dictionary is empty. Did you provide one?")
+        else:
+            # Inefficient customers move in the general area of the target location
+            ends[is_symbol] = target_cells.sample(symbol, rng, size=is_symbol.sum())
+    return np.stack(np.divmod(starts, table.n_cols), axis=1), np.stack(
+        np.divmod(ends, table.n_cols), axis=1
+    )
+
+
+def find_path(
+    grid: str | list[list[str, ...]],
+    unwalkables: list[str, ...],
+    start_symbol: str,
+    end_symbol: str,
+    store_locations: dict,
+    is_efficient: bool = True,
+    rng: np.random.Generator | None = None,
+) -> list[tuple[int, int], ...]:
+    """
+    drop-in replacement of path_finder.main that picks the start and end cells in the same way,
+    but looks the path up in a cached path table instead of searching it.
+    """
+    return find_paths(
+        grid, unwalkables, [start_symbol], [end_symbol], store_locations, is_efficient, rng
+    )[0]
+
+
+def find_paths(
+    grid: str | list[list[str, ...]],
+    unwalkables: list[str, ...],
+    start_symbols: list[str, ...],
+    end_symbols: list[str, ...],
+    store_locations: dict,
+    is_efficient: bool = True,
+    rng: np.random.Generator | None = None,
+) -> list[list[tuple[int, int], ...], ...]:
+    """returns the paths of many customers at once, e.g. of all customers of a minute"""
+    rng = np.random.default_rng() if rng is None else rng
+    if isinstance(grid, list):
+        grid = "\n".join("".join(row) for row in grid)
+    unwalkables = customer_unwalkables(unwalkables, store_locations, is_efficient=is_efficient)
+    table = get_path_table(grid, unwalkables)
+    target_cells = None
+    if store_locations:
+        target_cells = get_target_cells(grid, unwalkables, tuple(store_locations.items()))
+    starts, ends = pick_cells(table, start_symbols, end_symbols, target_cells, is_efficient, rng)
+    if table.grid.n_cells > MAX_TABLE_CELLS:
+        return paths_to_goals(table.grid, None, starts, ends)
+    return table.paths(starts, ends)
+
+
+def main() -> None:
+    """Looks up a path of the configured market twice, searching its target only the first time"""
+    for lookup in ("first", "cached"):
+        start = time.perf_counter()
+        path = find_path(
+            grid=MARKET,
+            unwalkables=UNWALKABLES,
+            start_symbol=Locations.ENTRANCE.value,
+            end_symbol=Locations.SPICES.value,
+            store_locations=STORE_LOCATIONS,
+        )
+        print(f"{lookup} lookup in {time.perf_counter() - start:.4f}s: {path}")
+
+
+if __name__ == "__main__":
+    main()
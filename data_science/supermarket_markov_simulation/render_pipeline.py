@@ -0,0 +1,239 @@
+"""
+Parallel video export of the visualized simulation as a producer/consumer pipeline:
+- the simulation (this process) produces a snapshot per minute, i.e. the customer ids and their
+  interpolated positions, and submits runs of minutes_per_task consecutive minutes as tasks to
+  a pool of worker processes
+- every worker renders the frames of a task with its own IncrementalRenderer on the background
+  map, which lives once in shared memory instead of being copied to every worker. Within a
+  task, only what changed between frames is redrawn. The first frame of a task follows a
+  minute the worker didn't render, so it is mostly redrawn, but like every frame it is the same
+  as a full redraw (see frame_renderer.py), i.e. the video doesn't depend on the workers.
+- a writer process encodes the frames into the video (see video_export.FrameSink)
+Frames are never pickled: every task renders straight into one of n_slots slots of frames in
+shared memory and only slot indices are passed around. This process hands the slots of rendered
+tasks to the writer in task order and the writer hands them back once it encoded them, so a
+task is only submitted when a slot is free. Memory is fixed at n_slots tasks of frames, while
+the rendering scales with the number of cores. The simulation and path finding still run in
+this process, so with a single core the pipeline can't be faster than video_export.py.
+"""
+# Imports
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from multiprocessing import Process, Queue
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from pathlib import Path
+from queue import Empty
+import numpy as np
+from create_supermarket_map import main as create_supermarket_map
+from frame_renderer import IncrementalRenderer
+from video_export import FrameSink, simulate_positions
+from visualize_supermarket_simulation import VisualizeCustomers, load_avatar
+import config
+from config import STORE_LOCATIONS, TILE_SIZE
+
+# Shared memory, renderer and frame slots of a worker process, set up once by init_worker
+_memories: list[SharedMemory, ...] = []
+_renderer: IncrementalRenderer | None = None
+_slots: np.ndarray | None = None
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """picklable handle of a uint8 array in shared memory."""
+
+    name: str
+    shape: tuple[int, ...]
+
+    @classmethod
+    def create(cls, shape: tuple[int, ...]) -> tuple[SharedMemory, "SharedArray"]:
+        """
+        allocates an array in shared memory and returns the memory (close and unlink it when
+        done) together with the handle that other processes can attach to
+        """
+        memory = SharedMemory(create=True, size=int(np.prod(shape)))
+        return memory, cls(name=memory.name, shape=tuple(shape))
+
+    @classmethod
+    def share(cls, array: np.ndarray) -> tuple[SharedMemory, "SharedArray"]:
+        """copies an array into shared memory, see create"""
+        memory, handle = cls.create(array.shape)
+        np.ndarray(array.shape, dtype=np.uint8, buffer=memory.buf)[:] = array
+        return memory, handle
+
+    def attach(self, writeable: bool = True) -> tuple[SharedMemory, np.ndarray]:
+        """returns the shared memory (keep it open while using the array) and the array"""
+        memory = SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=np.uint8, buffer=memory.buf)
+        array.flags.writeable = writeable
+        return memory, array
+
+
+def init_worker(
+    background: SharedArray, slots: SharedArray, avatar: np.ndarray, tile_size: int
+) -> None:
+    """attaches a worker process to the background and the frame slots and sets up its renderer"""
+    global _renderer, _slots
+    background_memory, shared_background = background.attach(writeable=False)
+    slots_memory, _slots = slots.attach()
+    _memories.extend([background_memory, slots_memory])
+    _renderer = IncrementalRenderer(
+        background=shared_background, avatar=avatar, tile_size=tile_size
+    )
+
+
+def render_task(slot: int, minutes: list[tuple[np.ndarray, np.ndarray], ...]) -> int:
+    """
+    renders the frames of a run of consecutive minutes, given as (ids, positions) pairs, into a
+    frame slot in a worker process and returns the number of frames
+    """
+    step = 0
+    for ids, positions in minutes:
+        for step_positions in positions:
+            _slots[slot, step] = _renderer.render(
+                ids, np.rint(step_positions * _renderer.tile_size)
+            )
+            step += 1
+    return step
+
+
+def write_frames(
+    jobs: Queue,
+    free_slots: Queue,
+    slots: SharedArray,
+    path: str,
+    fps: float,
+) -> None:
+    """
+    encodes the frames of the (slot, n_frames) jobs in the order they arrive until None arrives
+    and frees every slot once it is encoded
+    """
+    memory, frames = slots.attach(writeable=False)
+    with FrameSink(path=path, fps=fps, frame_size=slots.shape[2:4]) as sink:
+        while (job := jobs.get()) is not None:
+            slot, n_frames = job
+            for frame in frames[slot, :n_frames]:
+                sink.write(frame)
+            free_slots.put(slot)
+    del frames
+    memory.close()
+
+
+def take_free_slot(free_slots: Queue, writer: Process) -> int:
+    """returns a free frame slot, waiting for the writer to free one unless the writer died"""
+    while True:
+        try:
+            return free_slots.get(timeout=1)
+        except Empty:
+            if not writer.is_alive():
+                raise RuntimeError("The frame writer stopped unexpectedly!") from None
+
+
+def render_parallel(
+    path: str,
+    supermarket: VisualizeCustomers,
+    supermarket_map: np.ndarray,
+    avatar: np.ndarray,
+    duration: int,
+    frames_per_minute: int,
+    fps: float,
+    max_workers: int | None = None,
+    n_slots: int | None = None,
+    minutes_per_task: int = 2,
+) -> None:
+    """
+    simulates duration minutes and renders them in worker processes into the video at path. By
+    default, there is a frame slot per worker plus two for the writer.
+    """
+    if frames_per_minute < 1:
+        raise ValueError("At least one frame per minute must be rendered!")
+    if minutes_per_task < 1:
+        raise ValueError("Every task must render at least one minute!")
+    max_workers = max_workers or cpu_count() or 1
+    n_slots = n_slots or max_workers + 2
+    background_memory, background = SharedArray.share(supermarket_map)
+    slots_memory, slots = SharedArray.create(
+        (n_slots, minutes_per_task * frames_per_minute, *supermarket_map.shape)
+    )
+    jobs, free_slots = Queue(), Queue()
+    for slot in range(n_slots):
+        free_slots.put(slot)
+    writer = Process(target=write_frames, args=(jobs, free_slots, slots, path, fps))
+    writer.start()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(background, slots, avatar, TILE_SIZE),
+        ) as executor:
+            pending = deque()  # (slot, future) of the submitted tasks in order
+            minutes = simulate_positions(supermarket, duration, frames_per_minute)
+            while run := list(islice(minutes, minutes_per_task)):
+                # Hand rendered tasks to the writer in order. If all slots are being rendered,
+                # wait for the oldest task, otherwise the writer could never free a slot.
+                while pending and (pending[0][1].done() or len(pending) == n_slots):
+                    slot, task = pending.popleft()
+                    jobs.put((slot, task.result()))
+                slot = take_free_slot(free_slots, writer)
+                pending.append((slot, executor.submit(render_task, slot, run)))
+            while pending:
+                slot, task = pending.popleft()
+                jobs.put((slot, task.result()))
+        jobs.put(None)
+        writer.join()
+    finally:
+        if writer.is_alive():
+            writer.terminate()
+            writer.join()
+        if writer.exitcode:
+            # Nobody reads the queue anymore, so don't wait for its buffered jobs at exit
+            jobs.cancel_join_thread()
+        for memory in (background_memory, slots_memory):
+            memory.close()
+            memory.unlink()
+    if writer.exitcode:
+        raise RuntimeError(f"The frame writer failed with exit code {writer.exitcode}!")
+
+
+def main(
+    seed: int | None = None,
+    path: str | None = None,
+    fps: float | None = None,
+    frames_per_minute: int | None = None,
+    max_workers: int | None = None,
+) -> None:
+    """Renders the visualized simulation into a video with a pool of worker processes"""
+    supermarket_map = create_supermarket_map(
+        path_map=config.PATH_SUPERMARKETMAP, path_tile=config.PATH_TILES
+    )
+    if path is None:
+        save_str = config.output_path(f"simulation_{config.SIMULATION_DURATION}mins")
+        while Path(f"{save_str}.mp4").is_file():
+            save_str += "_new"
+        path = f"{save_str}.mp4"
+    supermarket = VisualizeCustomers(
+        store_locations=STORE_LOCATIONS,
+        avatar=load_avatar(config.PATH_TILES),
+        rng=np.random.default_rng(seed),
+        verbose=False,
+    )
+    render_parallel(
+        path=path,
+        supermarket=supermarket,
+        supermarket_map=supermarket_map,
+        avatar=supermarket.avatar,
+        duration=config.SIMULATION_DURATION,
+        frames_per_minute=(
+            config.VIDEO_FRAMES_PER_MINUTE if frames_per_minute is None else frames_per_minute
+        ),
+        fps=config.VIDEO_FPS if fps is None else fps,
+        max_workers=max_workers,
+    )
+    print(f"Rendered the simulation to {path}.")
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
@@ -0,0 +1,367 @@
+"""
+Pluggable search strategies for PathFinder. A strategy is a callable taking the walkability mask
+of the grid and the start and end cell (row-major indices) and returning a SearchResult with the
+cells of the path and the number of expanded cells:
+- AStar: A* with 4-connectivity and the Manhattan heuristic (like PathFinder's own search) or
+  8-connectivity and the octile heuristic, where diagonal steps cost sqrt(2)
+- BidirectionalAStar: two A* searches from the start and the end that meet in the middle
+- JumpPointSearch: A* on an 8-connected grid that only expands "jump points", i.e. skips the
+  symmetric paths of open areas, which cuts expansions on open floor plans
+With 8-connectivity, customers only step diagonally if both orthogonal cells are walkable, i.e.
+they don't cut corners of shelves. As in PathFinder, the start cell doesn't need to be walkable.
+"""
+# Imports
+import heapq
+from dataclasses import dataclass
+from itertools import count
+from math import sqrt
+from typing import Callable
+import numpy as np
+
+SQRT2 = sqrt(2)
+ORTHOGONAL_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL_STEPS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    """cells of the found path (None if there is none) and the number of expanded cells."""
+
+    path: list[int, ...] | None
+    n_expanded: int
+
+
+SearchStrategy = Callable[[np.ndarray, int, int], SearchResult]
+
+
+def manhattan(cell: tuple[int, int], target: tuple[int, int]) -> float:
+    """returns the Manhattan distance of two (row, col) cells"""
+    return abs(cell[0] - target[0]) + abs(cell[1] - target[1])
+
+
+def octile(cell: tuple[int, int], target: tuple[int, int]) -> float:
+    """returns the octile distance, i.e. the shortest 8-connected distance without obstacles"""
+    d_row, d_col = abs(cell[0] - target[0]), abs(cell[1] - target[1])
+    return max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col)
+
+
+def neighbors(
+    walkable: list[list[bool, ...], ...], row: int, col: int, diagonal: bool
+) -> list[tuple[int, int, float], ...]:
+    """returns the walkable (row, col, step cost) neighbors of a cell"""
+    result = []
+    for d_row, d_col in ORTHOGONAL_STEPS:
+        if is_walkable(walkable, row + d_row, col + d_col):
+            result.append((row + d_row, col + d_col, 1.0))
+    if diagonal:
+        for d_row, d_col in DIAGONAL_STEPS:
+            if (
+                is_walkable(walkable, row + d_row, col + d_col)
+                and walkable[row + d_row][col]
+                and walkable[row][col + d_col]
+            ):
+                result.append((row + d_row, col + d_col, SQRT2))
+    return result
+
+
+def is_walkable(walkable: list[list[bool, ...], ...], row: int, col: int) -> bool:
+    """checks whether a cell lies inside the grid and is walkable"""
+    return 0 <= row < len(walkable) and 0 <= col < len(walkable[0]) and walkable[row][col]
+
+
+def retrace(parents: dict[int, int], cell: int) -> list[int, ...]:
+    """returns the cells from the root of the parents to cell"""
+    path = [cell]
+    while cell in parents:
+        cell = parents[cell]
+        path.append(cell)
+    path.reverse()
+    return path
+
+
+@dataclass(frozen=True, slots=True)
+class AStar:
+    """A* with 4-connectivity (Manhattan) or 8-connectivity (octile)."""
+
+    diagonal: bool = False
+
+    def __call__(self, walkable: np.ndarray, start: int, end: int) -> SearchResult:
+        n_cols = walkable.shape[1]
+        walkable = walkable.tolist()  # indexing lists is much faster than indexing arrays
+        heuristic = octile if self.diagonal else manhattan
+        target = divmod(end, n_cols)
+        g_scores, parents, closed = {start: 0.0}, {}, set()
+        counter = count()
+        open_set = [(heuristic(divmod(start, n_cols), target), next(counter), start)]
+        while open_set:
+            _f_score, _, cell = heapq.heappop(open_set)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            if cell == end:
+                return SearchResult(retrace(parents, cell), len(closed))
+            row, col = divmod(cell, n_cols)
+            for n_row, n_col, cost in neighbors(walkable, row, col, self.diagonal):
+                neighbor = n_row * n_cols + n_col
+                tentative_g_score = g_scores[cell] + cost
+                if neighbor not in closed and tentative_g_score < g_scores.get(neighbor, np.inf):
+                    g_scores[neighbor] = tentative_g_score
+                    parents[neighbor] = cell
+                    f_score = tentative_g_score + heuristic((n_row, n_col), target)
+                    heapq.heappush(open_set, (f_score, next(counter), neighbor))
+        return SearchResult(None, len(closed))
+
+
+@dataclass(frozen=True, slots=True)
+class BidirectionalAStar:
+    """
+    runs A* forwards from the start and backwards from the end, alternating between both. The
+    search stops once no path through the open cells can be shorter than the best meeting.
+    """
+
+    diagonal: bool = False
+
+    def __call__(self, walkable: np.ndarray, start: int, end: int) -> SearchResult:
+        n_cols = walkable.shape[1]
+        walkable = walkable.tolist()  # indexing lists is much faster than indexing arrays
+        heuristic = octile if self.diagonal else manhattan
+        targets = (divmod(end, n_cols), divmod(start, n_cols))
+        g_scores = ({start: 0.0}, {end: 0.0})
+        parents, closed = ({}, {}), (set(), set())
+        counter = count()
+        open_sets = (
+            [(heuristic(divmod(start, n_cols), targets[0]), next(counter), start)],
+            [(heuristic(divmod(end, n_cols), targets[1]), next(counter), end)],
+        )
+        # Backwards, the (possibly unwalkable) start is a predecessor of the cells it can reach
+        start_row, start_col = divmod(start, n_cols)
+        start_steps = {
+            n_row * n_cols + n_col: cost
+            for n_row, n_col, cost in neighbors(walkable, start_row, start_col, self.diagonal)
+        }
+        best_cost, meeting = np.inf, None
+        if start == end:
+            best_cost, meeting = 0.0, start
+        direction = 0
+        while open_sets[0] and open_sets[1]:
+            # Any shorter path passes open cells of both searches, bounded by their best f
+            if best_cost <= max(open_sets[0][0][0], open_sets[1][0][0]):
+                break
+            _f_score, _, cell = heapq.heappop(open_sets[direction])
+            if cell not in closed[direction]:
+                closed[direction].add(cell)
+                row, col = divmod(cell, n_cols)
+                cell_neighbors = []
+                if direction == 0 or walkable[row][col]:
+                    cell_neighbors = neighbors(walkable, row, col, self.diagonal)
+                if direction == 1 and cell in start_steps and not walkable[start_row][start_col]:
+                    cell_neighbors.append((start_row, start_col, start_steps[cell]))
+                for n_row, n_col, cost in cell_neighbors:
+                    neighbor = n_row * n_cols + n_col
+                    tentative_g_score = g_scores[direction][cell] + cost
+                    if neighbor in closed[direction]:
+                        continue
+                    if tentative_g_score >= g_scores[direction].get(neighbor, np.inf):
+                        continue
+                    g_scores[direction][neighbor] = tentative_g_score
+                    parents[direction][neighbor] = cell
+                    f_score = tentative_g_score + heuristic((n_row, n_col), targets[direction])
+                    heapq.heappush(open_sets[direction], (f_score, next(counter), neighbor))
+                    if neighbor in g_scores[1 - direction]:
+                        cost_via = tentative_g_score + g_scores[1 - direction][neighbor]
+                        if cost_via < best_cost:
+                            best_cost, meeting = cost_via, neighbor
+            direction = 1 - direction
+        n_expanded = len(closed[0]) + len(closed[1])
+        if meeting is None:
+            return SearchResult(None, n_expanded)
+        forward = retrace(parents[0], meeting)
+        backward = retrace(parents[1], meeting)
+        return SearchResult(forward + backward[::-1][1:], n_expanded)
+
+
+@dataclass(frozen=True, slots=True)
+class JumpPointSearch:
+    """
+    Jump Point Search on an 8-connected grid without corner cutting. From every expanded cell,
+    the search "jumps" in straight and diagonal lines and only adds the cells where the optimal
+    path may turn (because of a forced neighbor) or the end to the open set.
+    """
+
+    def __call__(self, walkable: np.ndarray, start: int, end: int) -> SearchResult:
+        n_cols = walkable.shape[1]
+        walkable = walkable.tolist()  # indexing lists is much faster than indexing arrays
+        target = divmod(end, n_cols)
+        g_scores, parents, closed = {start: 0.0}, {}, set()
+        counter = count()
+        straight_jumps = {}  # results of straight jumps, shared by all diagonal jumps
+        open_set = [(octile(divmod(start, n_cols), target), next(counter), start)]
+        while open_set:
+            _f_score, _, cell = heapq.heappop(open_set)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            if cell == end:
+                return SearchResult(self._expand(retrace(parents, cell), n_cols), len(closed))
+            row, col = divmod(cell, n_cols)
+            for d_row, d_col in self._directions(walkable, row, col, parents.get(cell), n_cols):
+                jump_point = self._jump(
+                    walkable, row + d_row, col + d_col, d_row, d_col, target, straight_jumps
+                )
+                if jump_point is None:
+                    continue
+                neighbor = jump_point[0] * n_cols + jump_point[1]
+                tentative_g_score = g_scores[cell] + octile((row, col), jump_point)
+                if neighbor not in closed and tentative_g_score < g_scores.get(neighbor, np.inf):
+                    g_scores[neighbor] = tentative_g_score
+                    parents[neighbor] = cell
+                    f_score = tentative_g_score + octile(jump_point, target)
+                    heapq.heappush(open_set, (f_score, next(counter), neighbor))
+        return SearchResult(None, len(closed))
+
+    def _directions(
+        self,
+        walkable: list[list[bool, ...], ...],
+        row: int,
+        col: int,
+        parent: int | None,
+        n_cols: int,
+    ) -> list[tuple[int, int], ...]:
+        """returns the pruned directions to jump in from a cell reached from parent"""
+        if parent is None:
+            return [
+                (n_row - row, n_col - col)
+                for n_row, n_col, _cost in neighbors(walkable, row, col, diagonal=True)
+            ]
+        parent_row, parent_col = divmod(parent, n_cols)
+        d_row, d_col = np.sign(row - parent_row), np.sign(col - parent_col)
+        directions = []
+        if d_row and d_col:
+            if is_walkable(walkable, row + d_row, col):
+                directions.append((d_row, 0))
+            if is_walkable(walkable, row, col + d_col):
+                directions.append((0, d_col))
+            if is_walkable(walkable, row + d_row, col) and is_walkable(walkable, row, col + d_col):
+                directions.append((d_row, d_col))
+        elif d_row:
+            # Moving vertically, the cells left and right might be forced neighbors
+            for side in (-1, 1):
+                if is_walkable(walkable, row, col + side):
+                    directions.append((0, side))
+                    if is_walkable(walkable, row + d_row, col):
+                        directions.append((d_row, side))
+            if is_walkable(walkable, row + d_row, col):
+                directions.append((d_row, 0))
+        else:
+            for side in (-1, 1):
+                if is_walkable(walkable, row + side, col):
+                    directions.append((side, 0))
+                    if is_walkable(walkable, row, col + d_col):
+                        directions.append((side, d_col))
+            if is_walkable(walkable, row, col + d_col):
+                directions.append((0, d_col))
+        return [(int(d_r), int(d_c)) for d_r, d_c in directions]
+
+    def _jump(
+        self,
+        walkable: list[list[bool, ...], ...],
+        row: int,
+        col: int,
+        d_row: int,
+        d_col: int,
+        target: tuple[int, int],
+        straight_jumps: dict,
+    ) -> tuple[int, int] | None:
+        """follows a direction from a cell and returns the next jump point, if any"""
+        if not (d_row and d_col):
+            return self._jump_straight(walkable, row, col, d_row, d_col, target, straight_jumps)
+        while True:
+            if not is_walkable(walkable, row, col):
+                return None
+            if (row, col) == target:
+                return row, col
+            # A diagonal step is a jump point if a straight jump from it finds one
+            if (
+                self._jump_straight(walkable, row + d_row, col, d_row, 0, target, straight_jumps)
+                is not None
+                or self._jump_straight(
+                    walkable, row, col + d_col, 0, d_col, target, straight_jumps
+                )
+                is not None
+            ):
+                return row, col
+            # Without corner cutting, both orthogonal cells must be free to continue diagonally
+            if not (
+                is_walkable(walkable, row + d_row, col) and is_walkable(walkable, row, col + d_col)
+            ):
+                return None
+            row, col = row + d_row, col + d_col
+
+    @staticmethod
+    def _jump_straight(
+        walkable: list[list[bool, ...], ...],
+        row: int,
+        col: int,
+        d_row: int,
+        d_col: int,
+        target: tuple[int, int],
+        straight_jumps: dict,
+    ) -> tuple[int, int] | None:
+        """
+        follows a row or column and returns the next jump point, if any. All cells passed on the
+        way lead to the same jump point, so the result is stored for all of them and every line
+        is scanned at most once per search and direction.
+        """
+        scanned = []
+        while True:
+            key = (row, col, d_row, d_col)
+            if key in straight_jumps:
+                jump_point = straight_jumps[key]
+                break
+            scanned.append(key)
+            if not is_walkable(walkable, row, col):
+                jump_point = None
+                break
+            if (row, col) == target:
+                jump_point = row, col
+                break
+            # Forced neighbor: a side opens up that was blocked one step back
+            if d_row and any(
+                is_walkable(walkable, row, col + side)
+                and not is_walkable(walkable, row - d_row, col + side)
+                for side in (-1, 1)
+            ):
+                jump_point = row, col
+                break
+            if d_col and any(
+                is_walkable(walkable, row + side, col)
+                and not is_walkable(walkable, row + side, col - d_col)
+                for side in (-1, 1)
+            ):
+                jump_point = row, col
+                break
+            row, col = row + d_row, col + d_col
+        for key in scanned:
+            straight_jumps[key] = jump_point
+        return jump_point
+
+    @staticmethod
+    def _expand(jump_points: list[int, ...], n_cols: int) -> list[int, ...]:
+        """fills in the straight and diagonal lines between consecutive jump points"""
+        path = jump_points[:1]
+        for jump_point in jump_points[1:]:
+            row, col = divmod(path[-1], n_cols)
+            end_row, end_col = divmod(jump_point, n_cols)
+            d_row, d_col = np.sign(end_row - row), np.sign(end_col - col)
+            while (row, col) != (end_row, end_col):
+                row, col = row + d_row, col + d_col
+                path.append(int(row * n_cols + col))
+        return path
+
+
+def path_cost(path: list[int, ...], n_cols: int) -> float:
+    """returns the cost of a path, counting diagonal steps as sqrt(2)"""
+    return sum(
+        octile(divmod(cell, n_cols), divmod(next_cell, n_cols))
+        for cell, next_cell in zip(path, path[1:])
+    )
@@ -0,0 +1,201 @@
+"""
+Registry of several supermarkets that are simulated side by side. Every store lives in its own
+folder below the registry directory (default config.PATH_STORES, i.e. "stores/<store_id>/") and
+may contain:
+- layout.txt: the store's map in the MARKET format of config.py
+- store.json: {"arrival_rate": [min, max], "duration": minutes, "n_lanes": lanes,
+  "store_locations": {"C": [[x_min, x_max], [y_min, y_max]], ...}}
+- transitional_probabilities.csv: the store's transition matrix (optionally one per hour)
+- arrival_profile.csv: hourly arrival rates (see arrivals.py) that replace arrival_rate
+Anything missing falls back to the values of config.py. The stores are simulated concurrently
+in a process pool, one store per task, and their outputs are combined into one DataFrame keyed
+by store id. The layout and store locations of a store are used to render its map and to find
+the paths of its customers when the store is visualized (see render_store_video).
+"""
+# Imports
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from arrivals import ArrivalProfile, ArrivalSchedule
+from checkout import Checkout
+from transition_model import TransitionModel
+from vectorized_simulation import VectorizedSupermarket
+import config
+from config import MARKET, STORE_LOCATIONS
+
+
+@dataclass(frozen=True, eq=False)
+class StoreConfig:
+    """layout, customer flow, checkout and arrivals of one store"""
+
+    store_id: str
+    transition_model: TransitionModel = field(
+        default_factory=lambda: TransitionModel.compile(config.TRANS_PROB_MATRIX)
+    )
+    market: str = MARKET
+    store_locations: dict[str, tuple[tuple[int, int], tuple[int, int]]] = field(
+        default_factory=lambda: dict(STORE_LOCATIONS)
+    )
+    arrival_rate: tuple[int, int] = field(default_factory=lambda: config.CUSTOMER_ARRIVAL_RATE)
+    duration: int = field(default_factory=lambda: config.SIMULATION_DURATION)
+    n_lanes: int = 0  # 0 lets customers leave as soon as they reach the checkout
+    arrival_profile: ArrivalProfile | None = None  # time-varying arrivals instead of arrival_rate
+
+
+def load_store(path: str | Path) -> StoreConfig:
+    """loads the configuration of the store in the given folder"""
+    path = Path(path)
+    settings = {}
+    if (path / "store.json").is_file():
+        settings = json.loads((path / "store.json").read_text())
+    if "arrival_rate" in settings:
+        settings["arrival_rate"] = tuple(settings["arrival_rate"])
+    if "store_locations" in settings:
+        settings["store_locations"] = {
+            symbol: (tuple(x_minmax), tuple(y_minmax))
+            for symbol, (x_minmax, y_minmax) in settings["store_locations"].items()
+        }
+    if (path / "layout.txt").is_file():
+        settings["market"] = (path / "layout.txt").read_text().strip()
+    if (path / "transitional_probabilities.csv").is_file():
+        settings["transition_model"] = TransitionModel.from_csv(
+            path / "transitional_probabilities.csv"
+        )
+    if (path / "arrival_profile.csv").is_file():
+        settings["arrival_profile"] = ArrivalProfile.from_csv(path / "arrival_profile.csv")
+    return StoreConfig(store_id=path.name, **settings)
+
+
+def load_registry(directory: str | Path | None = None) -> dict[str, StoreConfig]:
+    """loads every store folder of the registry directory (default PATH_STORES) by store id"""
+    directory = config.PATH_STORES if directory is None else directory
+    return {
+        path.name: load_store(path)
+        for path in sorted(Path(directory).iterdir())
+        if path.is_dir()
+    }
+
+
+def simulate_store(
+    store: StoreConfig, seed: np.random.SeedSequence, with_names: bool = False
+) -> pd.DataFrame:
+    """runs one silent simulation of a store and returns its output with the store id"""
+    checkout = None
+    if store.n_lanes:
+        checkout = Checkout(n_lanes=store.n_lanes, rng=np.random.default_rng(seed.spawn(1)[0]))
+    arrivals = None
+    if store.arrival_profile is not None:
+        arrivals = ArrivalSchedule(profile=store.arrival_profile)
+    inst_supermarket = VectorizedSupermarket(
+        verbose=False,
+        with_names=with_names,
+        rng=np.random.default_rng(seed),
+        checkout=checkout,
+        arrivals=arrivals,
+    )
+    for _minute in range(store.duration):
+        inst_supermarket.next_minute()
+        inst_supermarket.add_new_customers(
+            frequency=store.arrival_rate, transition_probs=store.transition_model
+        )
+        inst_supermarket.record_customers()
+        inst_supermarket.remove_exiting_customers()
+    return inst_supermarket.simulation_output.assign(store_id=store.store_id)
+
+
+def simulate_stores(
+    stores: dict[str, StoreConfig],
+    seed: int | None = None,
+    with_names: bool = False,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """simulates all stores concurrently and combines their outputs"""
+    if not stores:
+        raise ValueError("There are no stores to simulate!")
+    store_list = [stores[store_id] for store_id in sorted(stores)]
+    seeds = np.random.SeedSequence(seed).spawn(len(store_list))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        outputs = list(
+            executor.map(simulate_store, store_list, seeds, [with_names] * len(store_list))
+        )
+    return pd.concat(outputs, ignore_index=True).set_index("store_id")
+
+
+def render_store_video(
+    store: StoreConfig,
+    path: str | Path,
+    seed: int | None = None,
+    frames_per_minute: int | None = None,
+    fps: float | None = None,
+) -> None:
+    """
+    renders the visualized simulation of a store into a video (see video_export.py): the map is
+    rendered from the store's layout and customers walk on it to the store's locations
+    """
+    # Only visualizing needs OpenCV, simulating stores doesn't
+    from create_supermarket_map import main as create_supermarket_map
+    from video_export import FrameSink, render_simulation
+    from visualize_supermarket_simulation import VisualizeCustomers, load_avatar
+
+    frames_per_minute = (
+        config.VIDEO_FRAMES_PER_MINUTE if frames_per_minute is None else frames_per_minute
+    )
+    if frames_per_minute < 1:
+        raise ValueError("At least one frame per minute must be rendered!")
+    supermarket_map = create_supermarket_map(
+        path_map=config.output_path(f"{store.store_id}_supermarket.png"),
+        path_tile=config.PATH_TILES,
+        layout=store.market,
+    )
+    arrivals = None
+    if store.arrival_profile is not None:
+        arrivals = ArrivalSchedule(profile=store.arrival_profile)
+    supermarket = VisualizeCustomers(
+        store_locations=store.store_locations,
+        market=store.market,
+        avatar=load_avatar(config.PATH_TILES),
+        rng=np.random.default_rng(seed),
+        verbose=False,
+        arrivals=arrivals,
+    )
+    with FrameSink(
+        path=path,
+        fps=config.VIDEO_FPS if fps is None else fps,
+        frame_size=supermarket_map.shape[:2],
+    ) as sink:
+        render_simulation(
+            sink=sink,
+            supermarket=supermarket,
+            supermarket_map=supermarket_map,
+            avatar=supermarket.avatar,
+            duration=store.duration,
+            frames_per_minute=frames_per_minute,
+            frequency=store.arrival_rate,
+            transition_probs=store.transition_model,
+        )
+
+
+def main(seed: int | None = None, with_videos: bool = False) -> None:
+    """
+    Simulates every store of the registry (or the store of config.py) and saves the output,
+    optionally together with a video of every store
+    """
+    stores = {"default": StoreConfig(store_id="default")}
+    if Path(config.PATH_STORES).is_dir():
+        stores = load_registry()
+    simulation_output = simulate_stores(stores, seed=seed)
+    print(simulation_output.groupby(level="store_id").size().rename("rows").to_string())
+    simulation_output.to_csv(
+        config.output_path(f"multi_store_simulation_{len(stores)}stores.csv")
+    )
+    if with_videos:
+        for store_id, store in stores.items():
+            render_store_video(store, config.output_path(f"{store_id}_simulation.mp4"), seed=seed)
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
@@ -0,0 +1,129 @@
+"""
+Streaming output of the simulation's event log to Parquet or Arrow IPC files. Every flush_every
+simulated minutes the rows collected in the EventLog are written as one row group (record
+batch) and the log is cleared, so memory stays bounded for long runs. Timestamps are stored as
+integer minutes and locations as dictionary (categorical) encoded integers. Run metadata such as
+the seed and the configuration is stored as schema metadata in the file footer.
+"""
+# Imports
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from event_log import EventLog
+from transition_model import TransitionModel
+from vectorized_simulation import VectorizedSupermarket
+import config
+
+
+@dataclass(slots=True)
+class StreamingWriter:
+    """periodically moves the rows of an EventLog into a Parquet or Arrow IPC file."""
+
+    path: str
+    event_log: EventLog
+    locations: tuple[str, ...]  # all location names, i.e. the categories of current_location
+    metadata: dict = field(default_factory=dict)
+    flush_every: int = 60  # minutes
+    file_format: str = "parquet"  # or "arrow"
+    last_flush: int = 0
+    schema: pa.Schema = field(init=False)
+    writer: pq.ParquetWriter | ipc.RecordBatchFileWriter = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.schema = pa.schema(
+            [
+                ("timestamp", pa.int32()),
+                ("customer_no", pa.int64()),
+                ("name", pa.string()),
+                ("current_location", pa.dictionary(pa.int8(), pa.string())),
+            ],
+            metadata={key: json.dumps(value) for key, value in self.metadata.items()},
+        )
+        if self.file_format == "parquet":
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        elif self.file_format == "arrow":
+            self.writer = ipc.new_file(self.path, self.schema)
+        else:
+            raise ValueError(f"Unknown file format {self.file_format}, use parquet or arrow!")
+
+    def __enter__(self) -> "StreamingWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def flush(self) -> None:
+        """writes all rows of the event log as one row group and clears the log."""
+        size = len(self.event_log)
+        if not size:
+            return
+        location_codes = pd.Categorical(
+            self.event_log.locations[:size], categories=self.locations
+        ).codes.astype(np.int8)
+        batch = pa.record_batch(
+            [
+                pa.array(self.event_log.timestamps[:size], type=pa.int32()),
+                pa.array(self.event_log.customer_nos[:size], type=pa.int64()),
+                pa.array(self.event_log.names[:size], type=pa.string(), from_pandas=True),
+                pa.DictionaryArray.from_arrays(
+                    location_codes, pa.array(self.locations, type=pa.string())
+                ),
+            ],
+            schema=self.schema,
+        )
+        if self.file_format == "parquet":
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+        self.event_log.clear()
+
+    def step(self, minute: int) -> None:
+        """flushes the event log if flush_every minutes have passed since the last flush."""
+        if minute - self.last_flush >= self.flush_every:
+            self.flush()
+            self.last_flush = minute
+
+    def close(self) -> None:
+        """writes the remaining rows and the file footer."""
+        self.flush()
+        self.writer.close()
+
+
+def main(seed: int | None = None, file_format: str = "parquet") -> None:
+    """Starts the vectorized supermarket simulation and streams its output to file"""
+    inst_supermarket = VectorizedSupermarket(verbose=False, rng=np.random.default_rng(seed))
+    transition_model = TransitionModel.compile(config.TRANS_PROB_MATRIX)
+    save_str = config.output_path(f"vectorized_simulation_{config.SIMULATION_DURATION}mins_{'-'.join(str(config.CUSTOMER_ARRIVAL_RATE).split('.'))}cpm")
+    while Path(f"{save_str}.{file_format}").is_file():
+        save_str += "_new"
+    metadata = {
+        "seed": seed,
+        "simulation_duration": config.SIMULATION_DURATION,
+        "customer_arrival_rate": config.CUSTOMER_ARRIVAL_RATE,
+        "transition_probabilities": config.TRANS_PROB_MATRIX.to_dict(orient="index"),
+    }
+    with StreamingWriter(
+        path=f"{save_str}.{file_format}",
+        event_log=inst_supermarket.event_log,
+        locations=transition_model.states,
+        metadata=metadata,
+        file_format=file_format,
+    ) as writer:
+        for _minute in range(config.SIMULATION_DURATION):
+            inst_supermarket.next_minute()
+            inst_supermarket.add_new_customers(
+                frequency=config.CUSTOMER_ARRIVAL_RATE, transition_probs=transition_model
+            )
+            inst_supermarket.record_customers()
+            inst_supermarket.remove_exiting_customers()
+            writer.step(minute=inst_supermarket.minutes)
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
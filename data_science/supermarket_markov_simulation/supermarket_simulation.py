@@ -3,44 +3,49 @@
 from dataclasses import dataclass, field
 from pathlib import Path
 import numpy as np
-from faker import Faker
 import pandas as pd
-from config import (
-    CUSTOMER_ARRIVAL_RATE,
-    SIMULATION_DURATION,
-    TRANS_PROB_MATRIX,
-)
+from arrivals import ArrivalSchedule
+from checkout import Checkout
+from event_log import EventLog
+from name_provider import NamePool
+from occupancy import OccupancyTracker
+from transition_model import TransitionModel
+import config
 
 
 @dataclass(slots=True)
 class Customer:
     """creates a customer object at location "entrance"""
 
-    transition_probs: pd.DataFrame
+    transition_model: TransitionModel
     customer_id: int = 0
-    name: str = "John Doe"
+    name: str | None = "John Doe"
     current_location: str = "entrance"
     previous_location: str = "entrance"
+    entry_minute: int = 0
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
 
     def __str__(self) -> str:
         """
         overwrites the str dunder function to return Customer information in a neater fashion.
         Use class_instance!r or repr(class_instance) method to get the repr dunder function
-        and thus all class attributes including self.transition_probs.
+        and thus all class attributes including self.transition_model.
         """
         customer_information = f"""
-        Name (id): {self.name:>26} ({self.customer_id})
+        Name (id): {str(self.name):>26} ({self.customer_id})
         Current Location: {self.current_location:>23}
         Previous Location: {self.previous_location:>22}"""
         return customer_information
 
-    def next_location(self) -> None:
+    def next_location(self, minute: int = 0) -> None:
         """transitions the customer to the next location"""
         self.previous_location = self.current_location
-        self.current_location = np.random.choice(
-            a=self.transition_probs.columns.values,
-            p=self.transition_probs.loc[self.current_location],
+        next_code = self.transition_model.next_code(
+            code=self.transition_model.codes[self.current_location],
+            draw=self.rng.random(),
+            minute=minute,
         )
+        self.current_location = self.transition_model.states[next_code]
 
     @property
     def is_active(self) -> bool:
@@ -55,9 +60,27 @@ class Supermarket:
     customers: list[Customer,...] = field(default_factory=list)
     minutes: int = 0
     last_id: int = 0
-    simulation_output: pd.DataFrame = pd.DataFrame(
-        columns=["timestamp", "customer_no", "name", "current_location"]
-    )
+    verbose: bool = True
+    event_log: EventLog = field(default_factory=EventLog)
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    with_names: bool = True  # if False, customers are only identified by their id
+    name_pool: NamePool | None = None
+    transition_probs: pd.DataFrame | TransitionModel | None = None
+    transition_model: TransitionModel | None = None
+    checkout: Checkout | None = None  # if None, customers leave as soon as they reach it
+    occupancy: OccupancyTracker = field(default_factory=OccupancyTracker)
+    arrivals: ArrivalSchedule | None = None  # if None, arrivals are uniform per minute
+
+    def __post_init__(self) -> None:
+        # Derive the name pool's seed from rng so that one seed reproduces the whole run
+        pool_seed = int(self.rng.integers(2**32))
+        if self.with_names and self.name_pool is None:
+            self.name_pool = NamePool(seed=pool_seed)
+
+    @property
+    def simulation_output(self) -> pd.DataFrame:
+        """returns all logged customer rows as a DataFrame"""
+        return self.event_log.to_frame()
 
     @property
     def get_time(self) -> str:
@@ -68,71 +91,96 @@ class Supermarket:
         """propagates each customer to the next state."""
         self.minutes += 1
         for customer in self.customers:
-            customer.next_location()
+            customer.next_location(minute=self.minutes)
+            if customer.current_location != customer.previous_location:
+                self.occupancy.move(
+                    from_code=customer.transition_model.codes[customer.previous_location],
+                    to_code=customer.transition_model.codes[customer.current_location],
+                )
 
     def add_new_customers(
-        self, frequency: tuple[int, int], transition_probs: pd.DataFrame
+        self, frequency: tuple[int, int], transition_probs: pd.DataFrame | TransitionModel
     ) -> None:
         """
         randomly creates new customers at a given frequency with transition_probs
-        transitional probabilities.
+        transitional probabilities. With an arrival schedule, frequency is ignored.
         """
-        n_customers = np.random.randint(low=frequency[0], high=frequency[1])
+        # Compile the transition probabilities only when they change
+        if transition_probs is not self.transition_probs:
+            self.transition_probs = transition_probs
+            self.transition_model = TransitionModel.compile(transition_probs)
+            self.occupancy.set_locations(self.transition_model.states)
+        if self.arrivals is not None:
+            n_customers = self.arrivals.n_arrivals(minute=self.minutes, rng=self.rng)
+        else:
+            n_customers = self.rng.integers(low=frequency[0], high=frequency[1])
         for new_customer_idx in range(n_customers):
+            customer_id = self.last_id + new_customer_idx
             self.customers.append(
                 Customer(
-                    transition_probs=transition_probs,
-                    customer_id=self.last_id + new_customer_idx,
-                    name=Faker().name(),
+                    transition_model=self.transition_model,
+                    customer_id=customer_id,
+                    name=self.name_pool.names_for(customer_id) if self.with_names else None,
+                    entry_minute=self.minutes,
+                    rng=self.rng,
                 )
             )
+        self.occupancy.enter(code=self.transition_model.codes["entrance"], n_customers=n_customers)
         self.last_id += n_customers
-        if n_customers:
+        if n_customers and self.verbose:
             print(f"{n_customers} new customer(s) entered the supermarket!")
 
     def remove_exiting_customers(self) -> None:
-        """removes every customer that is not active anymore."""
+        """removes every customer that is not active anymore and lets the checkout work."""
+        self.occupancy.snapshot(minute=self.minutes)
+        exiting = [customer for customer in self.customers if not customer.is_active]
+        for customer in exiting:
+            self.occupancy.exit(
+                code=customer.transition_model.codes[customer.current_location],
+                minutes_in_store=self.minutes - customer.entry_minute,
+            )
+        if self.checkout is not None:
+            self.checkout.admit(
+                customer_ids=[customer.customer_id for customer in exiting], minute=self.minutes
+            )
+            self.checkout.step(minute=self.minutes)
         self.customers = [customer for customer in self.customers if customer.is_active]
 
+    def record_customers(self) -> None:
+        """logs all customers with the current time and id without printing them."""
+        self.event_log.append(
+            minute=self.minutes,
+            customer_nos=[customer.customer_id for customer in self.customers],
+            names=[customer.name for customer in self.customers],
+            locations=[customer.current_location for customer in self.customers],
+        )
+
     def print_customers(self) -> None:
         """prints all customers with the current time and id in CSV format."""
+        self.record_customers()
+        if not self.verbose:
+            return
         print(f"At {self.get_time}, the following customers are currently in the supermarket:")
         for idx, customer in enumerate(self.customers):
             print(f"Customer No. {idx+1}", customer)
-            new_customer_output = [
-                self.get_time,
-                customer.customer_id,
-                customer.name,
-                customer.current_location,
-            ]
-            self.simulation_output = pd.concat(
-                [
-                    self.simulation_output,
-                    pd.DataFrame(
-                        new_customer_output,
-                        index=["timestamp", "customer_no", "name", "current_location"],
-                    ).T,
-                ],
-                axis=0,
-                ignore_index=True,
-            )
 
 
-def main() -> None:
+def main(seed: int | None = None) -> None:
     """Starts the supermarket simulation and save its output"""
-    inst_supermarket = Supermarket()
-    for _minute in range(SIMULATION_DURATION):
+    inst_supermarket = Supermarket(rng=np.random.default_rng(seed))
+    for _minute in range(config.SIMULATION_DURATION):
         inst_supermarket.next_minute()
         inst_supermarket.add_new_customers(
-            frequency=CUSTOMER_ARRIVAL_RATE, transition_probs=TRANS_PROB_MATRIX
+            frequency=config.CUSTOMER_ARRIVAL_RATE, transition_probs=config.TRANS_PROB_MATRIX
         )
         inst_supermarket.print_customers()
         inst_supermarket.remove_exiting_customers()
-    save_str = f"output/simulation_{SIMULATION_DURATION}mins_{'-'.join(str(CUSTOMER_ARRIVAL_RATE).split('.'))}cpm"
+    save_str = config.output_path(f"simulation_{config.SIMULATION_DURATION}mins_{'-'.join(str(config.CUSTOMER_ARRIVAL_RATE).split('.'))}cpm")
     while Path(save_str + ".csv").is_file():
         save_str += "_new"
     inst_supermarket.simulation_output.to_csv(save_str + ".csv")
 
 
 if __name__ == "__main__":
+    config.apply_cli_overrides()
     main()
@@ -0,0 +1,21 @@
+import numpy as np
+import cv2
+from config import MARKET, TILE_SIZE
+from create_supermarket_map import load_map
+
+
+def test_map_cache_keeps_one_entry_and_publishes_path_map(tmp_path):
+    rng = np.random.default_rng(0)
+    path_tile, path_map = tmp_path / "tiles.png", tmp_path / "supermarket.png"
+    cv2.imwrite(str(path_tile), rng.integers(0, 256, (8 * TILE_SIZE, 14 * TILE_SIZE, 3), np.uint8))
+    first, rendered = load_map(path_map, path_tile, MARKET, TILE_SIZE)
+    assert rendered
+    assert not load_map(path_map, path_tile, MARKET, TILE_SIZE)[1]
+    other, rendered = load_map(path_map, path_tile, MARKET.replace("F", "D"), TILE_SIZE)
+    assert rendered
+    assert np.array_equal(cv2.imread(str(path_map)), other)
+    assert len(list(tmp_path.glob("supermarket.*.png"))) == 1
+    # Switching back renders the first map again and shows it at path_map
+    again, rendered = load_map(path_map, path_tile, MARKET, TILE_SIZE)
+    assert rendered and np.array_equal(again, first)
+    assert np.array_equal(cv2.imread(str(path_map)), first)
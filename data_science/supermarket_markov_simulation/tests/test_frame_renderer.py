@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from frame_renderer import IncrementalRenderer
+
+TILE_SIZE = 16
+
+
+def make_renderer(rng: np.random.Generator) -> IncrementalRenderer:
+    background = rng.integers(0, 256, (6 * TILE_SIZE, 8 * TILE_SIZE, 3), dtype=np.uint8)
+    avatar = rng.integers(0, 256, (12, 10, 3), dtype=np.uint8)
+    return IncrementalRenderer(background=background, avatar=avatar, tile_size=TILE_SIZE)
+
+
+def fresh_render(renderer: IncrementalRenderer, ids: np.ndarray, pixels: np.ndarray) -> np.ndarray:
+    return IncrementalRenderer(
+        background=renderer.background, avatar=renderer.avatar, tile_size=renderer.tile_size
+    ).render(ids, pixels)
+
+
+def test_empty_after_avatars_restores_background():
+    renderer = make_renderer(np.random.default_rng(0))
+    renderer.render([1], [[0, 0]])
+    frame = renderer.render([], np.empty((0, 2)))
+    assert np.array_equal(frame, renderer.background)
+
+
+@pytest.mark.parametrize("seed", [2, 4, 13])
+def test_incremental_frames_match_full_redraws(seed):
+    rng = np.random.default_rng(seed)
+    renderer = make_renderer(rng)
+    max_pixel = np.array(renderer.frame.shape[:2]) - renderer.avatar.shape[:2]
+    ids = np.arange(20)
+    pixels = rng.integers(0, max_pixel, (len(ids), 2))
+    for _step in range(300):
+        # Customers walk, leave and arrive, so the layers of others in their cells change
+        moves = rng.random(len(ids)) < 0.2
+        pixels[moves] += rng.integers(-6, 7, (moves.sum(), 2))
+        pixels = np.clip(pixels, 0, max_pixel)
+        stays = rng.random(len(ids)) > 0.1
+        ids, pixels = ids[stays], pixels[stays]
+        n_new = rng.integers(0, 3)
+        ids = np.r_[ids, np.arange(n_new) + (ids.max() + 1 if len(ids) else 0)]
+        pixels = np.r_[pixels, rng.integers(0, max_pixel, (n_new, 2))]
+        order = rng.permutation(len(ids))
+        frame = renderer.render(ids[order], pixels[order])
+        assert np.array_equal(frame, fresh_render(renderer, ids, pixels))
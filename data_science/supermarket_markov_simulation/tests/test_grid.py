@@ -0,0 +1,14 @@
+import numpy as np
+from config import MARKET, STORE_LOCATIONS, UNWALKABLES
+from grid import Grid, TargetCells, cached_target_cells
+
+
+def test_target_cells_are_built_once_per_layout():
+    first = cached_target_cells(Grid.from_layout(MARKET, UNWALKABLES), STORE_LOCATIONS)
+    again = cached_target_cells(Grid.from_layout(MARKET, UNWALKABLES), STORE_LOCATIONS)
+    assert again is first
+    built = TargetCells.build(Grid.from_layout(MARKET, UNWALKABLES), STORE_LOCATIONS)
+    for symbol, cells in built.cells.items():
+        assert np.array_equal(first.cells[symbol], cells)
+    other = cached_target_cells(Grid.from_layout(MARKET, [*UNWALKABLES, "S"]), STORE_LOCATIONS)
+    assert other is not first
@@ -0,0 +1,30 @@
+import numpy as np
+from config import MARKET, UNWALKABLES
+from path_table import PathTable, paths_to_goals
+
+
+def test_targets_are_searched_on_first_lookup():
+    table = PathTable.build(MARKET, UNWALKABLES)
+    assert len(table.distances) == 0
+    start, end = table.find_cell("G"), table.find_cell("S")
+    path = table.path(start, end)
+    assert len(table.distances) == 1
+    assert path[0] == start and path[-1] == end
+    assert len(path) - 1 == table.distance(start, end)
+    # Every step moves to a walkable neighbor
+    steps = np.abs(np.diff(path, axis=0)).sum(axis=1)
+    assert (steps == 1).all()
+    assert all(table.grid.walkable[cell] for cell in path[1:])
+    table.path(table.find_cell("E"), end)
+    assert len(table.distances) == 1
+
+
+def test_paths_to_goals_match_the_table():
+    table = PathTable.build(MARKET, UNWALKABLES)
+    rng = np.random.default_rng(0)
+    walkable = np.flatnonzero(table.grid.walkable)
+    starts = np.stack(np.divmod(rng.choice(walkable, 30), table.n_cols), axis=1)
+    # Few distinct goals, as customers walk to few locations
+    goals = np.stack(np.divmod(rng.choice(walkable[:5], 30), table.n_cols), axis=1)
+    assert paths_to_goals(MARKET, UNWALKABLES, starts, goals) == table.paths(starts, goals)
+    assert paths_to_goals(MARKET, UNWALKABLES, [], []) == []
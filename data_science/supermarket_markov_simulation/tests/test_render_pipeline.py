@@ -0,0 +1,105 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+import cv2
+import config
+import render_pipeline
+from config import MARKET, STORE_LOCATIONS, TILE_SIZE
+from frame_renderer import IncrementalRenderer
+from video_export import render_simulation, simulate_positions
+from visualize_supermarket_simulation import VisualizeCustomers
+
+DURATION = 6
+FRAMES_PER_MINUTE = 3
+STATES = ["checkout", "dairy", "drinks", "fruit", "spices"]
+TRANS_PROB_MATRIX = pd.DataFrame(
+    [
+        [0.103, 0.737, 0.058, 0.050, 0.052],
+        [0.216, 0.011, 0.598, 0.088, 0.087],
+        [0.0, 0.288, 0.153, 0.377, 0.182],
+        [0.201, 0.096, 0.055, 0.597, 0.051],
+        [0.150, 0.193, 0.163, 0.091, 0.403],
+    ],
+    index=pd.Index(["dairy", "drinks", "entrance", "fruit", "spices"], name="before"),
+    columns=STATES,
+)
+
+
+class FrameList:
+    """collects copies of the written frames"""
+
+    def __init__(self) -> None:
+        self.frames = []
+
+    def write(self, frame: np.ndarray) -> None:
+        self.frames.append(frame.copy())
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    monkeypatch.setitem(vars(config), "TRANS_PROB_MATRIX", TRANS_PROB_MATRIX)
+    monkeypatch.setattr(config, "CUSTOMER_ARRIVAL_RATE", (1, 4))
+    rng = np.random.default_rng(0)
+    n_rows, n_cols = len(MARKET.splitlines()), len(MARKET.splitlines()[0])
+    background = rng.integers(0, 256, (n_rows * TILE_SIZE, n_cols * TILE_SIZE, 3), dtype=np.uint8)
+    avatar = rng.integers(0, 256, (TILE_SIZE, TILE_SIZE, 3), dtype=np.uint8)
+    return background, avatar
+
+
+def make_supermarket(avatar: np.ndarray) -> VisualizeCustomers:
+    return VisualizeCustomers(
+        store_locations=STORE_LOCATIONS, avatar=avatar, rng=np.random.default_rng(1), verbose=False
+    )
+
+
+def serial_frames(background: np.ndarray, avatar: np.ndarray) -> np.ndarray:
+    sink = FrameList()
+    render_simulation(
+        sink=sink,
+        supermarket=make_supermarket(avatar),
+        supermarket_map=background,
+        avatar=avatar,
+        duration=DURATION,
+        frames_per_minute=FRAMES_PER_MINUTE,
+    )
+    return np.stack(sink.frames)
+
+
+def test_tasks_on_alternating_workers_match_render_simulation(scene, monkeypatch):
+    background, avatar = scene
+    expected = serial_frames(background, avatar)
+    minutes = list(simulate_positions(make_supermarket(avatar), DURATION, FRAMES_PER_MINUTE))
+    slots = np.zeros((2, 2 * FRAMES_PER_MINUTE, *background.shape), dtype=np.uint8)
+    monkeypatch.setattr(render_pipeline, "_slots", slots)
+    # Two workers that take turns, so each of them skips the minutes of the other one
+    workers = [
+        IncrementalRenderer(background=background, avatar=avatar, tile_size=TILE_SIZE)
+        for _worker in range(2)
+    ]
+    frames = []
+    for task, start in enumerate(range(0, DURATION, 2)):
+        monkeypatch.setattr(render_pipeline, "_renderer", workers[task % 2])
+        n_frames = render_pipeline.render_task(task % 2, minutes[start : start + 2])
+        frames.append(slots[task % 2, :n_frames].copy())
+    assert np.array_equal(np.concatenate(frames), expected)
+
+
+@pytest.mark.parametrize("minutes_per_task", [1, 4])
+def test_render_parallel_matches_render_simulation(scene, tmp_path, minutes_per_task):
+    background, avatar = scene
+    render_pipeline.render_parallel(
+        path=str(tmp_path / "frames"),
+        supermarket=make_supermarket(avatar),
+        supermarket_map=background,
+        avatar=avatar,
+        duration=DURATION,
+        frames_per_minute=FRAMES_PER_MINUTE,
+        fps=FRAMES_PER_MINUTE,
+        max_workers=2,
+        n_slots=3,
+        minutes_per_task=minutes_per_task,
+    )
+    paths = sorted(Path(tmp_path / "frames").iterdir())
+    frames = np.stack([cv2.imread(str(path)) for path in paths])
+    assert np.array_equal(frames, serial_frames(background, avatar))
@@ -0,0 +1,140 @@
+"""
+Compiled Markov transition model of the supermarket customers. The (before x after) transition
+probability DataFrame is turned into integer state codes and a dense, square float64 matrix with
+precomputed cumulative rows once, so drawing a customer's next location becomes a binary search
+instead of a pandas indexing round trip. Optionally, one matrix per hour of the day can be
+provided to model different customer flows over the day.
+"""
+# Imports
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+import config
+
+
+@dataclass(frozen=True, eq=False)
+class TransitionModel:
+    """holds one or more compiled transition matrices and the state name <-> code mapping."""
+
+    states: tuple[str, ...]
+    probs: np.ndarray  # (n_periods, n_states, n_states), each row sums to 1
+    hours: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    codes: dict[str, int] = field(init=False, repr=False)
+    cum_probs: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        probs = np.asarray(self.probs, dtype=np.float64)
+        if probs.ndim == 2:
+            probs = probs[np.newaxis]
+        hours = np.asarray(self.hours, dtype=np.int64)
+        n_states = len(self.states)
+        if probs.shape[1:] != (n_states, n_states) or len(hours) != len(probs):
+            raise ValueError(
+                f"Expected {len(hours)} matrices of shape ({n_states}, {n_states}), got"
+                f" {probs.shape}!"
+            )
+        if np.any(np.diff(hours) <= 0):
+            raise ValueError("Hours of the transition matrices must be strictly increasing!")
+        if np.any(probs < 0) or not np.allclose(probs.sum(axis=2), 1.0, atol=1e-6):
+            raise ValueError("Transition probabilities must be non-negative and rows sum to 1!")
+        # Normalize every row (like rng.choice does) instead of moving any rounding residual of
+        # a row summing to 0.999... onto its last state
+        cum_probs = np.cumsum(probs, axis=2)
+        cum_probs /= cum_probs[..., -1:]
+        object.__setattr__(self, "probs", probs)
+        object.__setattr__(self, "hours", hours)
+        object.__setattr__(self, "codes", {state: code for code, state in enumerate(self.states)})
+        object.__setattr__(self, "cum_probs", cum_probs)
+
+    @classmethod
+    def from_frame(cls, transition_probs: pd.DataFrame) -> "TransitionModel":
+        """
+        compiles a (before x after) transition probability DataFrame. States without an outgoing
+        row (i.e. "checkout") become absorbing, states without an incoming column (i.e.
+        "entrance") are never entered.
+        """
+        return cls.from_frames({0: transition_probs})
+
+    @classmethod
+    def from_frames(cls, transition_probs: dict[int, pd.DataFrame]) -> "TransitionModel":
+        """
+        compiles one transition probability DataFrame per hour of the day. Each matrix applies
+        from its hour until the next given hour (wrapping around midnight).
+        """
+        hours = sorted(transition_probs)
+        states = list(
+            dict.fromkeys(
+                state
+                for hour in hours
+                for state in [*transition_probs[hour].columns, *transition_probs[hour].index]
+            )
+        )
+        matrices = []
+        for hour in hours:
+            frame = transition_probs[hour]
+            matrix = frame.reindex(index=states, columns=states, fill_value=0.0).to_numpy(
+                dtype=np.float64
+            )
+            absorbing = ~np.isin(states, frame.index)
+            matrix[absorbing, absorbing] = 1.0
+            matrices.append(matrix)
+        return cls(states=tuple(states), probs=np.stack(matrices), hours=np.array(hours))
+
+    @classmethod
+    def from_csv(cls, path: str | None = None) -> "TransitionModel":
+        """
+        loads the transition probabilities as written by the get_transitional_probabilities
+        notebook (by default the configured file). If the file contains an "hour" column, one
+        matrix per hour is compiled.
+        """
+        frame = pd.read_csv(config.PATH_TRANS_PROB_MATRIX if path is None else path)
+        if "hour" not in frame.columns:
+            return cls.from_frame(frame.set_index("before"))
+        return cls.from_frames(
+            {
+                int(hour): hourly.drop(columns="hour").set_index("before")
+                for hour, hourly in frame.groupby("hour")
+            }
+        )
+
+    @classmethod
+    def compile(cls, transition_probs: "pd.DataFrame | TransitionModel") -> "TransitionModel":
+        """returns transition_probs as a TransitionModel, compiling it if necessary."""
+        if isinstance(transition_probs, cls):
+            return transition_probs
+        return cls.from_frame(transition_probs)
+
+    @property
+    def is_time_dependent(self) -> bool:
+        """returns whether the model holds more than one matrix"""
+        return len(self.hours) > 1
+
+    def period(self, minute: int = 0) -> int:
+        """returns the index of the matrix active at a simulation minute"""
+        if not self.is_time_dependent:
+            return 0
+        hour = (minute // 60) % 24
+        # Before the first given hour, the last matrix of the previous day still applies
+        return int(np.searchsorted(self.hours, hour, side="right") - 1) % len(self.hours)
+
+    def matrix(self, minute: int = 0) -> pd.DataFrame:
+        """returns the (square) transition matrix active at a simulation minute"""
+        return pd.DataFrame(self.probs[self.period(minute)], index=self.states, columns=self.states)
+
+    def encode(self, states: list[str, ...] | np.ndarray) -> np.ndarray:
+        """returns the integer codes of state names"""
+        return np.array([self.codes[state] for state in states], dtype=np.int16)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """returns the state names of integer codes"""
+        return np.asarray(self.states, dtype=object)[codes]
+
+    def next_code(self, code: int, draw: float, minute: int = 0) -> int:
+        """returns the next state code of a single customer given a uniform draw in [0, 1)"""
+        return int(np.searchsorted(self.cum_probs[self.period(minute), code], draw, side="right"))
+
+    def next_codes(self, codes: np.ndarray, draws: np.ndarray, minute: int = 0) -> np.ndarray:
+        """returns the next state codes of many customers given one uniform draw each"""
+        cum_probs = self.cum_probs[self.period(minute)]
+        # Index of the first cumulative probability exceeding the draw is the next state
+        return (cum_probs[codes] <= draws[:, np.newaxis]).sum(axis=1).astype(np.int16)
@@ -0,0 +1,216 @@
+"""
+Vectorized Markov Chain Monte Carlo Simulation of Supermarket Customer behavior.
+Instead of one Customer object per shopper, all customer states are kept as integer codes in
+NumPy arrays and the whole population is advanced in one batched step: every customer draws a
+single uniform number which is compared against the cumulative transition probabilities of its
+current state.
+"""
+# Imports
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from arrivals import ArrivalSchedule
+from checkout import Checkout
+from event_log import EventLog
+from name_provider import NamePool
+from occupancy import OccupancyTracker
+from transition_model import TransitionModel
+import config
+
+
+@dataclass(slots=True)
+class VectorizedSupermarket:
+    """manages all customers in the market as arrays of integer location codes."""
+
+    minutes: int = 0
+    last_id: int = 0
+    transition_probs: pd.DataFrame | TransitionModel | None = None
+    transition_model: TransitionModel | None = None
+    customer_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    entry_minutes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    current_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))
+    previous_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))
+    verbose: bool = True
+    event_log: EventLog = field(default_factory=EventLog)
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    with_names: bool = True  # if False, customers are only identified by their id
+    name_pool: NamePool | None = None
+    checkout: Checkout | None = None  # if None, customers leave as soon as they reach it
+    occupancy: OccupancyTracker = field(default_factory=OccupancyTracker)
+    arrivals: ArrivalSchedule | None = None  # if None, arrivals are uniform per minute
+
+    def __post_init__(self) -> None:
+        # Derive the name pool's seed from rng so that one seed reproduces the whole run
+        pool_seed = int(self.rng.integers(2**32))
+        if self.with_names and self.name_pool is None:
+            self.name_pool = NamePool(seed=pool_seed)
+
+    @property
+    def simulation_output(self) -> pd.DataFrame:
+        """returns all logged customer rows as a DataFrame"""
+        return self.event_log.to_frame()
+
+    @property
+    def get_time(self) -> str:
+        """returns current time in HH:MM format"""
+        return f"{int(np.floor(self.minutes/60)):02}:{self.minutes%60:02}"
+
+    @property
+    def n_customers(self) -> int:
+        """returns the number of customers currently in the supermarket"""
+        return len(self.customer_ids)
+
+    @property
+    def states(self) -> tuple[str, ...]:
+        """returns all location names in the order of their integer codes"""
+        return self.transition_model.states
+
+    @property
+    def names(self) -> np.ndarray:
+        """returns the pooled name of every customer (None without names)"""
+        if not self.with_names:
+            return np.full(self.n_customers, None, dtype=object)
+        return self.name_pool.names_for(self.customer_ids)
+
+    @property
+    def current_locations(self) -> np.ndarray:
+        """returns the current location name of every customer"""
+        return self.transition_model.decode(self.current_codes)
+
+    @property
+    def previous_locations(self) -> np.ndarray:
+        """returns the previous location name of every customer"""
+        return self.transition_model.decode(self.previous_codes)
+
+    @property
+    def is_exiting(self) -> np.ndarray:
+        """returns a mask of all customers that have reached the checkout"""
+        return self.current_codes == self.transition_model.codes["checkout"]
+
+    def _set_transition_probs(self, transition_probs: pd.DataFrame | TransitionModel) -> None:
+        """compiles the transition probabilities once, all customers share the same matrix."""
+        if transition_probs is self.transition_probs:
+            return
+        if self.transition_probs is not None and self.n_customers:
+            raise ValueError(
+                "All customers of a VectorizedSupermarket must share one transition matrix!"
+            )
+        self.transition_probs = transition_probs
+        self.transition_model = TransitionModel.compile(transition_probs)
+        self.occupancy.set_locations(self.transition_model.states)
+
+    def next_minute(self) -> None:
+        """propagates all customers to their next state in one batched draw."""
+        self.minutes += 1
+        if not self.n_customers:
+            return
+        draws = self.rng.random(self.n_customers)
+        self.previous_codes = self.current_codes
+        self.current_codes = self.transition_model.next_codes(
+            codes=self.current_codes, draws=draws, minute=self.minutes
+        )
+        self.occupancy.move_many(from_codes=self.previous_codes, to_codes=self.current_codes)
+
+    def add_new_customers(
+        self, frequency: tuple[int, int], transition_probs: pd.DataFrame | TransitionModel
+    ) -> None:
+        """
+        randomly creates new customers at a given frequency with transition_probs
+        transitional probabilities. With an arrival schedule, frequency is ignored.
+        """
+        self._set_transition_probs(transition_probs)
+        if self.arrivals is not None:
+            n_customers = self.arrivals.n_arrivals(minute=self.minutes, rng=self.rng)
+        else:
+            n_customers = self.rng.integers(low=frequency[0], high=frequency[1])
+        if not n_customers:
+            return
+        entrance = np.full(n_customers, self.transition_model.codes["entrance"], dtype=np.int16)
+        self.customer_ids = np.concatenate(
+            [self.customer_ids, np.arange(self.last_id, self.last_id + n_customers)]
+        )
+        self.entry_minutes = np.concatenate(
+            [self.entry_minutes, np.full(n_customers, self.minutes, dtype=np.int32)]
+        )
+        self.occupancy.enter(code=entrance[0], n_customers=n_customers)
+        self.current_codes = np.concatenate([self.current_codes, entrance])
+        self.previous_codes = np.concatenate([self.previous_codes, entrance])
+        self.last_id += n_customers
+        if self.verbose:
+            print(f"{n_customers} new customer(s) entered the supermarket!")
+
+    def remove_exiting_customers(self) -> None:
+        """removes every customer that has reached the checkout and lets the checkout work."""
+        self.occupancy.snapshot(minute=self.minutes)
+        if self.n_customers:
+            self._remove(is_exiting=self.is_exiting)
+        if self.checkout is not None:
+            self.checkout.step(minute=self.minutes)
+
+    def _remove(self, is_exiting: np.ndarray) -> None:
+        """drops the exiting customers from all arrays and hands them to the checkout."""
+        self.occupancy.exit_many(
+            codes=self.current_codes[is_exiting],
+            minutes_in_store=self.minutes - self.entry_minutes[is_exiting],
+        )
+        if self.checkout is not None:
+            self.checkout.admit(customer_ids=self.customer_ids[is_exiting], minute=self.minutes)
+        is_active = ~is_exiting
+        self.customer_ids = self.customer_ids[is_active]
+        self.entry_minutes = self.entry_minutes[is_active]
+        self.current_codes = self.current_codes[is_active]
+        self.previous_codes = self.previous_codes[is_active]
+
+    def record_customers(self) -> None:
+        """logs all customers with the current time and id without printing them."""
+        self.event_log.append(
+            minute=self.minutes,
+            customer_nos=self.customer_ids,
+            names=self.names,
+            locations=self.current_locations,
+        )
+
+    def print_customers(self) -> None:
+        """prints all customers with the current time and id in CSV format."""
+        self.record_customers()
+        if not self.verbose:
+            return
+        print(f"At {self.get_time}, the following customers are currently in the supermarket:")
+        print(
+            "\n".join(
+                f"""Customer No. {idx+1}
+        Name (id): {str(name):>26} ({customer_id})
+        Current Location: {current:>23}
+        Previous Location: {previous:>22}"""
+                for idx, (name, customer_id, current, previous) in enumerate(
+                    zip(
+                        self.names,
+                        self.customer_ids,
+                        self.current_locations,
+                        self.previous_locations,
+                    )
+                )
+            )
+        )
+
+
+def main(seed: int | None = None) -> None:
+    """Starts the vectorized supermarket simulation and save its output"""
+    inst_supermarket = VectorizedSupermarket(rng=np.random.default_rng(seed))
+    for _minute in range(config.SIMULATION_DURATION):
+        inst_supermarket.next_minute()
+        inst_supermarket.add_new_customers(
+            frequency=config.CUSTOMER_ARRIVAL_RATE, transition_probs=config.TRANS_PROB_MATRIX
+        )
+        inst_supermarket.print_customers()
+        inst_supermarket.remove_exiting_customers()
+    save_str = config.output_path(f"vectorized_simulation_{config.SIMULATION_DURATION}mins_{'-'.join(str(config.CUSTOMER_ARRIVAL_RATE).split('.'))}cpm")
+    while Path(save_str + ".csv").is_file():
+        save_str += "_new"
+    inst_supermarket.simulation_output.to_csv(save_str + ".csv")
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
@@ -0,0 +1,188 @@
+"""
+Headless video export of the visualized simulation. Instead of showing every minute in a window
+and waiting for a key press, frames are streamed into a video file (cv2.VideoWriter, .mp4 or
+.avi) or an image sequence (a directory of numbered PNGs), so long simulations can be rendered
+in batch on servers without a display. Every simulated minute is rendered as
+VIDEO_FRAMES_PER_MINUTE frames in which the customers walk along their paths from their previous
+to their current location, i.e. their positions are interpolated linearly along the path.
+Frames are drawn incrementally (see frame_renderer.py).
+"""
+# Imports
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+import cv2
+from create_supermarket_map import main as create_supermarket_map
+from frame_renderer import IncrementalRenderer
+from transition_model import TransitionModel
+from visualize_supermarket_simulation import VisualizeCustomers, load_avatar
+import config
+from config import STORE_LOCATIONS, TILE_SIZE, UNWALKABLES
+
+# Codecs of the supported video containers
+VIDEO_CODECS = {".mp4": "mp4v", ".avi": "MJPG"}
+
+
+@dataclass(slots=True)
+class FrameSink:
+    """writes frames into a video file or, if path has no suffix, into a directory of PNGs."""
+
+    path: str | Path
+    fps: float
+    frame_size: tuple[int, int]  # (height, width) of the frames
+    n_frames: int = 0
+    writer: cv2.VideoWriter | None = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        suffix = self.path.suffix.lower()
+        if not suffix:
+            self.path.mkdir(parents=True, exist_ok=True)
+            return
+        if suffix not in VIDEO_CODECS:
+            raise ValueError(f"Unknown video format {suffix}, use one of {list(VIDEO_CODECS)}!")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        height, width = self.frame_size
+        self.writer = cv2.VideoWriter(
+            str(self.path), cv2.VideoWriter_fourcc(*VIDEO_CODECS[suffix]), self.fps, (width, height)
+        )
+        if not self.writer.isOpened():
+            raise ValueError(f"Could not open a video writer for {self.path}!")
+
+    def __enter__(self) -> "FrameSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, frame: np.ndarray) -> None:
+        """appends a frame to the video or image sequence"""
+        if self.writer is not None:
+            self.writer.write(frame)
+        elif not cv2.imwrite(str(self.path / f"{self.n_frames:06}.png"), frame):
+            raise ValueError(f"Could not write frame {self.n_frames} to {self.path}!")
+        self.n_frames += 1
+
+    def close(self) -> None:
+        """finishes the video file"""
+        if self.writer is not None:
+            self.writer.release()
+
+
+def interpolate_paths(paths: list[list[tuple[int, int], ...], ...], n_steps: int) -> np.ndarray:
+    """
+    returns the (row, col) positions of all customers after every of n_steps equal steps along
+    their paths, shape (n_steps, n_customers, 2). The last step is the end of every path.
+    """
+    if not paths:
+        return np.empty((n_steps, 0, 2))
+    # Pad the paths to one array by repeating their last cell
+    lengths = np.array([len(path) for path in paths])
+    padded = np.empty((len(paths), lengths.max(), 2))
+    for idx, path in enumerate(paths):
+        padded[idx, : len(path)] = path
+        padded[idx, len(path) :] = path[-1]
+    # Fractional index along every path per step, then interpolate between its two cells
+    progress = np.arange(1, n_steps + 1)[:, None] / n_steps * (lengths - 1)
+    lower = np.floor(progress).astype(np.int64)
+    upper = np.minimum(lower + 1, lengths - 1)
+    customers = np.arange(len(paths))
+    weight = (progress - lower)[..., None]
+    return (1 - weight) * padded[customers, lower] + weight * padded[customers, upper]
+
+
+def simulate_positions(
+    supermarket: VisualizeCustomers,
+    duration: int,
+    frames_per_minute: int,
+    frequency: tuple[int, int] | None = None,
+    transition_probs: pd.DataFrame | TransitionModel | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    simulates duration minutes and yields the ids of the customers of every minute together with
+    their (frames_per_minute, n_customers, 2) positions while walking to their new locations.
+    frequency and transition_probs default to those of config.py.
+    """
+    frequency = config.CUSTOMER_ARRIVAL_RATE if frequency is None else frequency
+    transition_probs = config.TRANS_PROB_MATRIX if transition_probs is None else transition_probs
+    for _minute in range(duration):
+        supermarket.next_minute()
+        supermarket.add_new_customers(frequency=frequency, transition_probs=transition_probs)
+        paths = supermarket.find_paths(
+            unwalkables=UNWALKABLES,
+            start_names=[customer.previous_location for customer in supermarket.customers],
+            end_names=[customer.current_location for customer in supermarket.customers],
+            is_efficient=False,
+        )
+        ids = np.array([customer.customer_id for customer in supermarket.customers], dtype=int)
+        yield ids, interpolate_paths(paths, frames_per_minute)
+        supermarket.record_customers()
+        supermarket.remove_exiting_customers()
+
+
+def render_simulation(
+    sink: FrameSink,
+    supermarket: VisualizeCustomers,
+    supermarket_map: np.ndarray,
+    avatar: np.ndarray,
+    duration: int,
+    frames_per_minute: int,
+    frequency: tuple[int, int] | None = None,
+    transition_probs: pd.DataFrame | TransitionModel | None = None,
+) -> None:
+    """simulates duration minutes and writes frames_per_minute frames of every minute to sink"""
+    renderer = IncrementalRenderer(background=supermarket_map, avatar=avatar, tile_size=TILE_SIZE)
+    minutes = simulate_positions(
+        supermarket, duration, frames_per_minute, frequency, transition_probs
+    )
+    for ids, positions in minutes:
+        for step_positions in positions:
+            sink.write(renderer.render(ids, np.rint(step_positions * TILE_SIZE)))
+
+
+def main(
+    seed: int | None = None,
+    path: str | None = None,
+    fps: float | None = None,
+    frames_per_minute: int | None = None,
+) -> None:
+    """Renders the visualized simulation headless into a video (or image sequence if no suffix)"""
+    if frames_per_minute is None:
+        frames_per_minute = config.VIDEO_FRAMES_PER_MINUTE
+    if frames_per_minute < 1:
+        raise ValueError("At least one frame per minute must be rendered!")
+    supermarket_map = create_supermarket_map(
+        path_map=config.PATH_SUPERMARKETMAP, path_tile=config.PATH_TILES
+    )
+    if path is None:
+        save_str = config.output_path(f"simulation_{config.SIMULATION_DURATION}mins")
+        while Path(f"{save_str}.mp4").is_file():
+            save_str += "_new"
+        path = f"{save_str}.mp4"
+    supermarket = VisualizeCustomers(
+        store_locations=STORE_LOCATIONS,
+        avatar=load_avatar(config.PATH_TILES),
+        rng=np.random.default_rng(seed),
+        verbose=False,
+    )
+    with FrameSink(
+        path=path,
+        fps=config.VIDEO_FPS if fps is None else fps,
+        frame_size=supermarket_map.shape[:2],
+    ) as sink:
+        render_simulation(
+            sink=sink,
+            supermarket=supermarket,
+            supermarket_map=supermarket_map,
+            avatar=supermarket.avatar,
+            duration=config.SIMULATION_DURATION,
+            frames_per_minute=frames_per_minute,
+        )
+    print(f"Rendered {sink.n_frames} frames to {path}.")
+
+
+if __name__ == "__main__":
+    config.apply_cli_overrides()
+    main()
@@ -1,19 +1,17 @@
 from dataclasses import dataclass, field
+from pathlib import Path
 import numpy as np
 import cv2
 from supermarket_simulation import Supermarket
 from create_supermarket_map import main as create_supermarket_map
-from path_finder import main as run_pathfinder
+from frame_renderer import IncrementalRenderer
+from path_table import find_path as lookup_path, find_paths as lookup_paths
+import config
 from config import (
-    CUSTOMER_ARRIVAL_RATE,
     Locations,
     MARKET,
-    PATH_SUPERMARKETMAP,
-    PATH_TILES,
-    SIMULATION_DURATION,
     STORE_LOCATIONS,
     TILE_SIZE,
-    TRANS_PROB_MATRIX,
     UNWALKABLES,
 )
 
@@ -22,30 +20,60 @@ from config import (
 class VisualizeCustomers(Supermarket):
     """Draws and navigates the avatar of the customer on the map"""
 
-    avatar: np.ndarray = np.full(shape=(32, 32, 3), fill_value=255)
+    avatar: np.ndarray = field(
+        default_factory=lambda: np.full(shape=(32, 32, 3), fill_value=255, dtype=np.uint8)
+    )
     store_locations: dict = field(default_factory=dict)
+    market: str = MARKET  # layout the customers walk on, unless a grid is passed
 
     def find_path(
         self,
-        grid: str | list[list[str, ...]] = MARKET,
-        unwalkables: list[str, ...] = field(default_factory=list),
+        grid: str | list[list[str, ...]] | None = None,
+        unwalkables: list[str, ...] | None = None,
         start_name: str = "entrance",
         end_name: str = "exit",
         is_efficient: bool = True,
     ) -> list[tuple[int, int], ...]:
-        """Returns a path object with x,y coordinates for each move to the target"""
+        """
+        Returns a path object with x,y coordinates for each move to the target. Paths are looked
+        up in a path table that is built once per grid instead of running A* every time.
+        """
         #! We might not actually need this and can call run_pathfinder directly instead...
         all_members = [member for member in dir(Locations) if not member.startswith("_")]
         if not all(loc_name in all_members for loc_name in [start_name.upper(), end_name.upper()]):
             raise ValueError("Either start or end name is unknown!")
 
-        return run_pathfinder(
-            grid=grid,
-            unwalkables=unwalkables,
+        return lookup_path(
+            grid=self.market if grid is None else grid,
+            unwalkables=[] if unwalkables is None else unwalkables,
             start_symbol=Locations.__members__[start_name.upper()].value,
             end_symbol=Locations.__members__[end_name.upper()].value,
             store_locations=self.store_locations,
             is_efficient=is_efficient,
+            rng=self.rng,
+        )
+
+    def find_paths(
+        self,
+        grid: str | list[list[str, ...]] | None = None,
+        unwalkables: list[str, ...] | None = None,
+        start_names: list[str, ...] = (),
+        end_names: list[str, ...] = (),
+        is_efficient: bool = True,
+    ) -> list[list[tuple[int, int], ...], ...]:
+        """Returns the paths of many customers at once, see find_path"""
+        all_members = [member for member in dir(Locations) if not member.startswith("_")]
+        if not all(loc_name.upper() in all_members for loc_name in [*start_names, *end_names]):
+            raise ValueError("Either a start or an end name is unknown!")
+
+        return lookup_paths(
+            grid=self.market if grid is None else grid,
+            unwalkables=[] if unwalkables is None else unwalkables,
+            start_symbols=[Locations[name.upper()].value for name in start_names],
+            end_symbols=[Locations[name.upper()].value for name in end_names],
+            store_locations=self.store_locations,
+            is_efficient=is_efficient,
+            rng=self.rng,
         )
 
     def draw_background(self, background: np.ndarray, supermarket_map: np.ndarray) -> np.ndarray:
@@ -67,37 +95,47 @@ class VisualizeCustomers(Supermarket):
         ] = self.avatar
 
 
-def main() -> None:
-    supermarket_map = create_supermarket_map(path_map=PATH_SUPERMARKETMAP, path_tile=PATH_TILES)
-    background = np.zeros(np.shape(supermarket_map), np.uint8)
-    tiles = cv2.imread(PATH_TILES)
+def load_avatar(path_tile: str) -> np.ndarray:
+    """Returns the customer avatar tile of the tile sheet"""
+    tiles = cv2.imread(path_tile)
     customer_avatar = (4 * TILE_SIZE, 0 * TILE_SIZE)
-    customer_avatar = tiles[
+    return tiles[
         customer_avatar[0] : customer_avatar[0] + TILE_SIZE,
         customer_avatar[1] : customer_avatar[1] + TILE_SIZE,
         :,
     ]
+
+
+def main(seed: int | None = None) -> None:
+    supermarket_map = create_supermarket_map(
+        path_map=config.PATH_SUPERMARKETMAP, path_tile=config.PATH_TILES
+    )
+    customer_avatar = load_avatar(config.PATH_TILES)
     inst_viz_customers = VisualizeCustomers(
-        store_locations=STORE_LOCATIONS, avatar=customer_avatar
+        store_locations=STORE_LOCATIONS, avatar=customer_avatar, rng=np.random.default_rng(seed)
+    )
+    # Only redraw the tiles of customers that moved instead of the whole frame
+    renderer = IncrementalRenderer(
+        background=supermarket_map, avatar=customer_avatar, tile_size=TILE_SIZE
     )
+    Path(config.PATH_ANIMATION).mkdir(parents=True, exist_ok=True)
     # Start simulation
-    for _minute in range(SIMULATION_DURATION):
-        frame = inst_viz_customers.draw_background(
-            background=background, supermarket_map=supermarket_map
-        )
+    for _minute in range(config.SIMULATION_DURATION):
         inst_viz_customers.next_minute()
         inst_viz_customers.add_new_customers(
-            frequency=CUSTOMER_ARRIVAL_RATE, transition_probs=TRANS_PROB_MATRIX
+            frequency=config.CUSTOMER_ARRIVAL_RATE, transition_probs=config.TRANS_PROB_MATRIX
+        )
+        # Get every customer's target location, find all paths and draw to target locations
+        paths = inst_viz_customers.find_paths(
+            unwalkables=UNWALKABLES,
+            start_names=[customer.previous_location for customer in inst_viz_customers.customers],
+            end_names=[customer.current_location for customer in inst_viz_customers.customers],
+            is_efficient=False,
+        )
+        frame = renderer.render(
+            ids=[customer.customer_id for customer in inst_viz_customers.customers],
+            pixels=np.array([path[-1] for path in paths]).reshape(-1, 2) * TILE_SIZE,
         )
-        # For each customer, get target location, find the path and draw to target location
-        for customer in inst_viz_customers.customers:
-            path = inst_viz_customers.find_path(
-                unwalkables=UNWALKABLES,
-                start_name=customer.previous_location,
-                end_name=customer.current_location,
-                is_efficient=False,
-            )
-            inst_viz_customers.draw_move(frame=frame, location=path[-1])
         inst_viz_customers.print_customers()
         # Show frame with dynamically title, that updates simulation on SPACEBAR and aborts on q
         while True:
@@ -107,7 +145,7 @@ def main() -> None:
             )
             key = chr(cv2.waitKey(1) & 0xFF)
             if key == " ":  # Spacebar
-                cv2.imwrite(f"images/animation/{_minute:02}min.png", frame)
+                cv2.imwrite(f"{config.PATH_ANIMATION}/{_minute:02}min.png", frame)
                 break
             if key == "q":
                 cv2.destroyAllWindows()
@@ -116,4 +154,5 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    config.apply_cli_overrides()
     main()